@@ -1156,7 +1156,7 @@ async def update_captcha_config(
     token: str = Depends(verify_admin_token)
 ):
     """Update captcha configuration"""
-    from ..services.browser_captcha import validate_browser_proxy_url
+    from ..services.browser_captcha import validate_browser_proxy_url, invalidate_captcha_config_cache
 
     captcha_method = request.get("captcha_method")
     yescaptcha_api_key = request.get("yescaptcha_api_key")
@@ -1191,6 +1191,7 @@ async def update_captcha_config(
         browser_proxy_url=browser_proxy_url if browser_proxy_enabled else None,
         browser_count=max(1, int(browser_count)) if browser_count else 1
     )
+    invalidate_captcha_config_cache()
 
     # 如果使用 browser 打码，热重载浏览器数量配置
     if captcha_method == "browser":
@@ -1,9 +1,48 @@
+import ipaddress
+import time
+from typing import Dict, Optional, Tuple
+
 from fastapi import APIRouter, Request
 from fastapi.responses import PlainTextResponse
 import httpx
 
 router = APIRouter()
 
+# ipapi.co 结果缓存：client_ip -> (过期时间, 详情文本)
+_IP_CACHE_TTL = 300
+_IP_CACHE_MAX = 1024
+_ip_cache: Dict[str, Tuple[float, str]] = {}
+
+# 复用同一个客户端，避免每次请求重新建立 TLS 连接
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=5.0,
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """关闭共享的 httpx 客户端（应用关闭时调用）"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+def _is_private_ip(ip: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return addr.is_private or addr.is_loopback or addr.is_link_local
+
+
 @router.get("/ip.txt", response_class=PlainTextResponse)
 async def get_ip_details(request: Request):
     # Get client IP, considering proxies
@@ -13,9 +52,15 @@ async def get_ip_details(request: Request):
     else:
         client_ip = request.client.host
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://ipapi.co/{client_ip}/json/", timeout=5.0)
+    now = time.monotonic()
+    cached = _ip_cache.get(client_ip)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    # 内网地址在 ipapi.co 查不到任何信息，直接跳过外部请求
+    if not _is_private_ip(client_ip):
+        try:
+            response = await _get_http_client().get(f"https://ipapi.co/{client_ip}/json/")
             if response.status_code == 200:
                 data = response.json()
                 details = [
@@ -26,8 +71,15 @@ async def get_ip_details(request: Request):
                     f"ASN: {data.get('asn')}",
                     f"Org: {data.get('org')}"
                 ]
-                return "\n".join(details)
-    except Exception:
-        pass
-    
+                text = "\n".join(details)
+                if len(_ip_cache) >= _IP_CACHE_MAX:
+                    for ip in [k for k, v in _ip_cache.items() if v[0] <= now]:
+                        del _ip_cache[ip]
+                    if len(_ip_cache) >= _IP_CACHE_MAX:
+                        _ip_cache.clear()
+                _ip_cache[client_ip] = (now + _IP_CACHE_TTL, text)
+                return text
+        except Exception:
+            pass
+
     return f"IP: {client_ip}\nDetails: Information unavailable"
@@ -1,7 +1,7 @@
 """Configuration management for Flow2API"""
 import tomli
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 
 class Config:
     """Application configuration"""
@@ -10,6 +10,7 @@ class Config:
         self._config = self._load_config()
         self._admin_username: Optional[str] = None
         self._admin_password: Optional[str] = None
+        self._debug_listeners: List[Callable[[], None]] = []
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from setting.toml"""
@@ -20,6 +21,15 @@ class Config:
     def reload_config(self):
         """Reload configuration from file"""
         self._config = self._load_config()
+        self._notify_debug_listeners()
+
+    def add_debug_listener(self, callback: Callable[[], None]):
+        """Register a callback invoked whenever the debug settings change"""
+        self._debug_listeners.append(callback)
+
+    def _notify_debug_listeners(self):
+        for callback in self._debug_listeners:
+            callback()
 
     def get_raw_config(self) -> Dict[str, Any]:
         """Get raw configuration dictionary"""
@@ -122,6 +132,7 @@ class Config:
         if "debug" not in self._config:
             self._config["debug"] = {}
         self._config["debug"]["enabled"] = enabled
+        self._notify_debug_listeners()
 
     @property
     def image_timeout(self) -> int:
@@ -190,6 +201,11 @@ class Config:
             self._config["cache"] = {}
         self._config["cache"]["base_url"] = base_url
 
+    @property
+    def cache_accel_redirect_prefix(self) -> str:
+        """Get internal location prefix for X-Accel-Redirect (empty = serve files from Python)"""
+        return self._config.get("cache", {}).get("accel_redirect_prefix", "")
+
     # Captcha configuration
     @property
     def captcha_method(self) -> str:
@@ -290,6 +306,41 @@ class Config:
             self._config["captcha"] = {}
         self._config["captcha"]["capsolver_base_url"] = base_url
 
+    @property
+    def browser_minimal_flags(self) -> bool:
+        """Whether the personal captcha browser starts with the reduced-footprint Chromium flag set"""
+        return self._config.get("captcha", {}).get("browser_minimal_flags", True)
+
+    @property
+    def browser_block_static_resources(self) -> bool:
+        """Whether personal-mode Flow tabs block fonts, images and video while loading"""
+        return self._config.get("captcha", {}).get("browser_block_static_resources", True)
+
+    @property
+    def browser_max_resident_tabs(self) -> int:
+        """Maximum number of resident project tabs kept open by the personal captcha browser (0 = unlimited)"""
+        return int(self._config.get("captcha", {}).get("browser_max_resident_tabs", 20))
+
+    @property
+    def browser_max_concurrent_executes(self) -> int:
+        """Maximum concurrent grecaptcha.execute calls in the personal captcha browser"""
+        return int(self._config.get("captcha", {}).get("browser_max_concurrent_executes", 4))
+
+    @property
+    def browser_resident_tab_max_uses(self) -> int:
+        """Recycle a personal-mode resident tab after this many tokens (0 = never)"""
+        return int(self._config.get("captcha", {}).get("browser_resident_tab_max_uses", 200))
+
+    @property
+    def browser_resident_tab_max_age_seconds(self) -> int:
+        """Recycle a personal-mode resident tab after it has been open this long (0 = never)"""
+        return int(self._config.get("captcha", {}).get("browser_resident_tab_max_age_seconds", 3600))
+
+    @property
+    def browser_max_custom_tabs(self) -> int:
+        """Maximum number of score-test tabs kept open by the personal captcha browser (0 = unlimited)"""
+        return int(self._config.get("captcha", {}).get("browser_max_custom_tabs", 8))
+
 
 # Global config instance
 config = Config()
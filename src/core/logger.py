@@ -1,11 +1,67 @@
 """Debug logger module for detailed API request/response logging"""
+import functools
 import json
 import logging
-from datetime import datetime
+import re
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Mapping, Optional
 from .config import config
 
+# Separator lines, built once
+_SEP_EQ = "=" * 100
+_SEP_DASH = "-" * 100
+
+# Header masking patterns, compiled once at import
+_BEARER_RE = re.compile(r'^Bearer\s+(\S+)$')
+_SESSION_COOKIE_RE = re.compile(r'(__Secure-next-auth\.session-token=)([^;]+)')
+_AUTH_KEYS = ("Authorization", "authorization")
+
+# 需要按 max_length 截断的大字段（通常是 base64 图片数据）
+_TRUNCATE_KEYS = frozenset(("encodedImage", "base64", "imageData", "data"))
+
+# Debug switches copied out of config so the log fast path is a plain global load.
+# Refreshed by config whenever the debug settings change.
+_debug_enabled = False
+_log_requests = True
+_log_responses = True
+_mask_tokens = True
+
+
+def _refresh_debug_flags():
+    global _debug_enabled, _log_requests, _log_responses, _mask_tokens
+    _debug_enabled = config.debug_enabled
+    _log_requests = config.debug_log_requests
+    _log_responses = config.debug_log_responses
+    _mask_tokens = config.debug_mask_token
+
+
+_refresh_debug_flags()
+config.add_debug_listener(_refresh_debug_flags)
+
+# (second, formatted prefix) of the last timestamp; one tuple so threads never see a mismatched pair
+_ts_cache = (-1, "")
+
+
+def _ts() -> str:
+    """Format current local time as 'YYYY-mm-dd HH:MM:SS.mmm' (seconds part cached per second)"""
+    global _ts_cache
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _ts_cache
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        _ts_cache = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1000):03d}"
+
+
+@functools.lru_cache(maxsize=2048)
+def _mask_token_cached(token: str, mask_enabled: bool) -> str:
+    """Masked form of a token; the same session tokens are logged over and over"""
+    if not mask_enabled or len(token) <= 12:
+        return token
+    return f"{token[:6]}...{token[-6:]}"
+
 class DebugLogger:
     """Debug logger for API requests and responses"""
 
@@ -45,17 +101,38 @@ class DebugLogger:
 
     def _mask_token(self, token: str) -> str:
         """Mask token for logging (show first 6 and last 6 characters)"""
-        if not config.debug_mask_token or len(token) <= 12:
-            return token
-        return f"{token[:6]}...{token[-6:]}"
+        return _mask_token_cached(token, _mask_tokens)
+
+    def _emit(self, lines: List[str]):
+        """Write a whole log event as a single record (one write + flush)"""
+        self.logger.info("\n".join(lines))
 
-    def _format_timestamp(self) -> str:
-        """Format current timestamp"""
-        return datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    def _needs_truncation(self, data: Any, max_length: int = 200) -> bool:
+        """判断数据中是否存在需要截断的字段（迭代遍历，命中即返回）
 
-    def _write_separator(self, char: str = "=", length: int = 100):
-        """Write separator line"""
-        self.logger.info(char * length)
+        Args:
+            data: 要检查的数据
+            max_length: 字符串字段的最大长度
+
+        Returns:
+            存在超长字段时返回 True
+        """
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                for key, value in item.items():
+                    if isinstance(value, str):
+                        limit = max_length if key in _TRUNCATE_KEYS else 10000
+                        if len(value) > limit:
+                            return True
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
+            elif isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, str) and len(item) > 10000:
+                return True
+        return False
 
     def _truncate_large_fields(self, data: Any, max_length: int = 200) -> Any:
         """对大字段进行截断处理，特别是 base64 编码的图片数据
@@ -65,19 +142,25 @@ class DebugLogger:
             max_length: 字符串字段的最大长度
         
         Returns:
-            截断后的数据副本
+            截断后的数据副本；没有超长字段时直接返回原对象
         """
+        if not self._needs_truncation(data, max_length):
+            return data
+        return self._truncate_walk(data, max_length)
+
+    def _truncate_walk(self, data: Any, max_length: int) -> Any:
+        """递归重建数据并截断超长字段"""
         if isinstance(data, dict):
             result = {}
             for key, value in data.items():
                 # 对特定的大字段进行截断
-                if key in ("encodedImage", "base64", "imageData", "data") and isinstance(value, str) and len(value) > max_length:
+                if key in _TRUNCATE_KEYS and isinstance(value, str) and len(value) > max_length:
                     result[key] = f"{value[:100]}... (truncated, total {len(value)} chars)"
                 else:
-                    result[key] = self._truncate_large_fields(value, max_length)
+                    result[key] = self._truncate_walk(value, max_length)
             return result
         elif isinstance(data, list):
-            return [self._truncate_large_fields(item, max_length) for item in data]
+            return [self._truncate_walk(item, max_length) for item in data]
         elif isinstance(data, str) and len(data) > 10000:
             # 对超长字符串进行截断（可能是未知的 base64 字段）
             return f"{data[:100]}... (truncated, total {len(data)} chars)"
@@ -94,67 +177,70 @@ class DebugLogger:
     ):
         """Log API request details to log.txt"""
 
-        if not config.debug_enabled or not config.debug_log_requests:
+        if not _debug_enabled or not _log_requests:
             return
 
+        lines: List[str] = []
         try:
-            self._write_separator()
-            self.logger.info(f"🔵 [REQUEST] {self._format_timestamp()}")
-            self._write_separator("-")
+            lines.append(_SEP_EQ)
+            lines.append(f"🔵 [REQUEST] {_ts()}")
+            lines.append(_SEP_DASH)
 
             # Basic info
-            self.logger.info(f"Method: {method}")
-            self.logger.info(f"URL: {url}")
+            lines.append(f"Method: {method}")
+            lines.append(f"URL: {url}")
 
             # Headers
-            self.logger.info("\n📋 Headers:")
+            lines.append("\n📋 Headers:")
             masked_headers = dict(headers)
-            if "Authorization" in masked_headers or "authorization" in masked_headers:
-                auth_key = "Authorization" if "Authorization" in masked_headers else "authorization"
-                auth_value = masked_headers[auth_key]
-                if auth_value.startswith("Bearer "):
-                    token = auth_value[7:]
-                    masked_headers[auth_key] = f"Bearer {self._mask_token(token)}"
+            for auth_key in _AUTH_KEYS:
+                if auth_key in masked_headers:
+                    masked_headers[auth_key] = _BEARER_RE.sub(
+                        lambda m: f"Bearer {self._mask_token(m.group(1))}",
+                        masked_headers[auth_key]
+                    )
+                    break
 
             # Mask Cookie header (ST token)
             if "Cookie" in masked_headers:
-                cookie_value = masked_headers["Cookie"]
-                if "__Secure-next-auth.session-token=" in cookie_value:
-                    parts = cookie_value.split("=", 1)
-                    if len(parts) == 2:
-                        st_token = parts[1].split(";")[0]
-                        masked_headers["Cookie"] = f"__Secure-next-auth.session-token={self._mask_token(st_token)}"
+                masked_headers["Cookie"] = _SESSION_COOKIE_RE.sub(
+                    lambda m: m.group(1) + self._mask_token(m.group(2)),
+                    masked_headers["Cookie"]
+                )
 
             for key, value in masked_headers.items():
-                self.logger.info(f"  {key}: {value}")
+                lines.append(f"  {key}: {value}")
 
             # Body
             if body is not None:
-                self.logger.info("\n📦 Request Body:")
+                lines.append("\n📦 Request Body:")
                 if isinstance(body, (dict, list)):
-                    body_str = json.dumps(body, indent=2, ensure_ascii=False)
-                    self.logger.info(body_str)
+                    # 对大字段进行截断处理（上传图片时请求体包含 base64 数据）
+                    body_to_log = self._truncate_large_fields(body)
+                    body_str = json.dumps(body_to_log, indent=2, ensure_ascii=False)
+                    lines.append(body_str)
                 else:
-                    self.logger.info(str(body))
+                    lines.append(str(body))
 
             # Files
             if files:
-                self.logger.info("\n📎 Files:")
+                lines.append("\n📎 Files:")
                 try:
                     if hasattr(files, 'keys') and callable(getattr(files, 'keys', None)):
                         for key in files.keys():
-                            self.logger.info(f"  {key}: <file data>")
+                            lines.append(f"  {key}: <file data>")
                     else:
-                        self.logger.info("  <multipart form data>")
+                        lines.append("  <multipart form data>")
                 except (AttributeError, TypeError):
-                    self.logger.info("  <binary file data>")
+                    lines.append("  <binary file data>")
 
             # Proxy
             if proxy:
-                self.logger.info(f"\n🌐 Proxy: {proxy}")
+                lines.append(f"\n🌐 Proxy: {proxy}")
 
-            self._write_separator()
-            self.logger.info("")  # Empty line
+            lines.append(_SEP_EQ)
+            lines.append("")  # Empty line
+            self._emit(lines)
 
         except Exception as e:
             self.logger.error(f"Error logging request: {e}")
@@ -162,40 +248,44 @@ class DebugLogger:
     def log_response(
         self,
         status_code: int,
-        headers: Dict[str, str],
+        headers: Mapping[str, str],
         body: Any,
         duration_ms: Optional[float] = None
     ):
-        """Log API response details to log.txt"""
+        """Log API response details to log.txt (body may be raw bytes; decoded only when logging)"""
 
-        if not config.debug_enabled or not config.debug_log_responses:
+        if not _debug_enabled or not _log_responses:
             return
 
+        if isinstance(body, (bytes, bytearray)):
+            body = body.decode("utf-8", errors="replace")
+
+        lines: List[str] = []
         try:
-            self._write_separator()
-            self.logger.info(f"🟢 [RESPONSE] {self._format_timestamp()}")
-            self._write_separator("-")
+            lines.append(_SEP_EQ)
+            lines.append(f"🟢 [RESPONSE] {_ts()}")
+            lines.append(_SEP_DASH)
 
             # Status
             status_emoji = "✅" if 200 <= status_code < 300 else "❌"
-            self.logger.info(f"Status: {status_code} {status_emoji}")
+            lines.append(f"Status: {status_code} {status_emoji}")
 
             # Duration
             if duration_ms is not None:
-                self.logger.info(f"Duration: {duration_ms:.2f}ms")
+                lines.append(f"Duration: {duration_ms:.2f}ms")
 
             # Headers
-            self.logger.info("\n📋 Response Headers:")
+            lines.append("\n📋 Response Headers:")
             for key, value in headers.items():
-                self.logger.info(f"  {key}: {value}")
+                lines.append(f"  {key}: {value}")
 
             # Body
-            self.logger.info("\n📦 Response Body:")
+            lines.append("\n📦 Response Body:")
             if isinstance(body, (dict, list)):
                 # 对大字段进行截断处理
                 body_to_log = self._truncate_large_fields(body)
                 body_str = json.dumps(body_to_log, indent=2, ensure_ascii=False)
-                self.logger.info(body_str)
+                lines.append(body_str)
             elif isinstance(body, str):
                 # Try to parse as JSON
                 try:
@@ -203,18 +293,19 @@ class DebugLogger:
                     # 对大字段进行截断处理
                     parsed = self._truncate_large_fields(parsed)
                     body_str = json.dumps(parsed, indent=2, ensure_ascii=False)
-                    self.logger.info(body_str)
+                    lines.append(body_str)
                 except:
                     # Not JSON, log as text (limit length)
                     if len(body) > 2000:
-                        self.logger.info(f"{body[:2000]}... (truncated)")
+                        lines.append(f"{body[:2000]}... (truncated)")
                     else:
-                        self.logger.info(body)
+                        lines.append(body)
             else:
-                self.logger.info(str(body))
+                lines.append(str(body))
 
-            self._write_separator()
-            self.logger.info("")  # Empty line
+            lines.append(_SEP_EQ)
+            lines.append("")  # Empty line
+            self._emit(lines)
 
         except Exception as e:
             self.logger.error(f"Error logging response: {e}")
@@ -227,54 +318,56 @@ class DebugLogger:
     ):
         """Log API error details to log.txt"""
 
-        if not config.debug_enabled:
+        if not _debug_enabled:
             return
 
+        lines: List[str] = []
         try:
-            self._write_separator()
-            self.logger.info(f"🔴 [ERROR] {self._format_timestamp()}")
-            self._write_separator("-")
+            lines.append(_SEP_EQ)
+            lines.append(f"🔴 [ERROR] {_ts()}")
+            lines.append(_SEP_DASH)
 
             if status_code:
-                self.logger.info(f"Status Code: {status_code}")
+                lines.append(f"Status Code: {status_code}")
 
-            self.logger.info(f"Error Message: {error_message}")
+            lines.append(f"Error Message: {error_message}")
 
             if response_text:
-                self.logger.info("\n📦 Error Response:")
+                lines.append("\n📦 Error Response:")
                 # Try to parse as JSON
                 try:
                     parsed = json.loads(response_text)
                     body_str = json.dumps(parsed, indent=2, ensure_ascii=False)
-                    self.logger.info(body_str)
+                    lines.append(body_str)
                 except:
                     # Not JSON, log as text
                     if len(response_text) > 2000:
-                        self.logger.info(f"{response_text[:2000]}... (truncated)")
+                        lines.append(f"{response_text[:2000]}... (truncated)")
                     else:
-                        self.logger.info(response_text)
+                        lines.append(response_text)
 
-            self._write_separator()
-            self.logger.info("")  # Empty line
+            lines.append(_SEP_EQ)
+            lines.append("")  # Empty line
+            self._emit(lines)
 
         except Exception as e:
             self.logger.error(f"Error logging error: {e}")
 
     def log_info(self, message: str):
         """Log general info message to log.txt"""
-        if not config.debug_enabled:
+        if not _debug_enabled:
             return
         try:
-            self.logger.info(f"ℹ️  [{self._format_timestamp()}] {message}")
+            self.logger.info(f"ℹ️  [{_ts()}] {message}")
         except Exception as e:
             self.logger.error(f"Error logging info: {e}")
 
     def log_warning(self, message: str):
         """Log warning message to log.txt"""
-        if not config.debug_enabled:
+        if not _debug_enabled:
             return
         try:
-            self.logger.warning(f"⚠️  [{self._format_timestamp()}] {message}")
+            self.logger.warning(f"⚠️  [{_ts()}] {message}")
         except Exception as e:
             self.logger.error(f"Error logging warning: {e}")
 
@@ -1,7 +1,11 @@
 """FastAPI application initialization"""
 import os
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, FileResponse
+import hashlib
+import mimetypes
+from typing import Optional, Tuple
+from urllib.parse import quote
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -16,6 +20,7 @@ from .services.load_balancer import LoadBalancer
 from .services.concurrency_manager import ConcurrencyManager
 from .services.generation_handler import GenerationHandler
 from .api import routes, admin
+from .api.ip_info import close_http_client as close_ip_info_client
 
 
 @asynccontextmanager
@@ -99,6 +104,10 @@ async def lifespan(app: FastAPI):
             # 直接启动常驻模式（会自动导航到项目页面，cookie已持久化）
             await browser_service.start_resident_mode(resident_project_id)
             print(f"✓ Browser captcha resident mode started (project: {resident_project_id[:8]}...)")
+            # 后台为所有活跃 token 的项目预热 get_token 使用的常驻标签页，避免首个请求承担页面加载耗时
+            browser_service.start_prewarm(
+                [t.current_project_id for t in tokens if t.current_project_id and t.is_active]
+            )
         else:
             # 没有可用的project_id时，打开登录窗口供用户手动操作
             await browser_service.open_login_window()
@@ -119,13 +128,13 @@ async def lifespan(app: FastAPI):
     # Start 429 auto-unban task
     import asyncio
     async def auto_unban_task():
-        """定时任务：每小时检查并解禁429被禁用的token"""
+        """定时任务：在最早的429禁用到期时解禁token（无待解禁token时每小时兜底检查）"""
         while True:
             try:
-                await asyncio.sleep(3600)  # 每小时执行一次
                 await token_manager.auto_unban_429_tokens()
             except Exception as e:
                 print(f"❌ Auto-unban task error: {e}")
+            await token_manager.wait_for_next_unban()
 
     auto_unban_task_handle = asyncio.create_task(auto_unban_task())
 
@@ -133,7 +142,7 @@ async def lifespan(app: FastAPI):
     print(f"✓ Total tokens: {len(tokens)}")
     print(f"✓ Cache: {'Enabled' if config.cache_enabled else 'Disabled'} (timeout: {config.cache_timeout}s)")
     print(f"✓ File cache cleanup task started")
-    print(f"✓ 429 auto-unban task started (runs every hour)")
+    print(f"✓ 429 auto-unban task started (runs when bans expire, at least hourly)")
     print(f"✓ Server running on http://{config.server_host}:{config.server_port}")
     print("=" * 60)
 
@@ -153,6 +162,8 @@ async def lifespan(app: FastAPI):
     if browser_service:
         await browser_service.close()
         print("✓ Browser captcha service closed")
+    # Close shared HTTP client used for IP lookups
+    await close_ip_info_client()
     print("✓ File cache cleanup task stopped")
     print("✓ 429 auto-unban task stopped")
 
@@ -207,34 +218,75 @@ app.include_router(admin.router)
 # Static files - serve tmp directory for cached files
 tmp_dir = Path(__file__).parent.parent / "tmp"
 tmp_dir.mkdir(exist_ok=True)
-app.mount("/tmp", StaticFiles(directory=str(tmp_dir)), name="tmp")
+accel_redirect_prefix = config.cache_accel_redirect_prefix
+
+if accel_redirect_prefix:
+    # Behind nginx: only resolve the file here and let the proxy send it with sendfile(2), e.g.
+    #   location /_internal_tmp/ { internal; alias /app/tmp/; sendfile on; tcp_nopush on; }
+    tmp_root = tmp_dir.resolve()
+    accel_redirect_prefix = accel_redirect_prefix.rstrip("/") + "/"
+
+    @app.get("/tmp/{file_path:path}", name="tmp")
+    async def tmp_file(file_path: str):
+        """Hand cached files off to the reverse proxy via X-Accel-Redirect"""
+        target = (tmp_root / file_path).resolve()
+        if not target.is_relative_to(tmp_root) or not target.is_file():
+            return Response(status_code=404)
+        media_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        return Response(
+            status_code=200,
+            media_type=media_type,
+            headers={"X-Accel-Redirect": accel_redirect_prefix + quote(file_path)}
+        )
+else:
+    app.mount("/tmp", StaticFiles(directory=str(tmp_dir)), name="tmp")
 
 # HTML routes for frontend
 static_path = Path(__file__).parent.parent / "static"
 
 
+def _load_page(name: str) -> Optional[Tuple[bytes, str]]:
+    """Read a static HTML page once, returning (content, etag)"""
+    page_file = static_path / name
+    if not page_file.exists():
+        return None
+    content = page_file.read_bytes()
+    return content, f'"{hashlib.md5(content).hexdigest()}"'
+
+
+# Frontend pages are static, so they are read once at startup instead of per request
+login_html = _load_page("login.html")
+manage_html = _load_page("manage.html")
+
+
+def _page_response(request: Request, page: Tuple[bytes, str]) -> Response:
+    """Serve a cached page, answering 304 when the client already has it"""
+    content, etag = page
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="text/html", headers=headers)
+
+
 @app.get("/", response_class=HTMLResponse)
-async def index():
+async def index(request: Request):
     """Redirect to login page"""
-    login_file = static_path / "login.html"
-    if login_file.exists():
-        return FileResponse(str(login_file))
+    if login_html:
+        return _page_response(request, login_html)
     return HTMLResponse(content="<h1>Flow2API</h1><p>Frontend not found</p>", status_code=404)
 
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page():
+async def login_page(request: Request):
     """Login page"""
-    login_file = static_path / "login.html"
-    if login_file.exists():
-        return FileResponse(str(login_file))
+    if login_html:
+        return _page_response(request, login_html)
     return HTMLResponse(content="<h1>Login Page Not Found</h1>", status_code=404)
 
 
 @app.get("/manage", response_class=HTMLResponse)
-async def manage_page():
+async def manage_page(request: Request):
     """Management console page"""
-    manage_file = static_path / "manage.html"
-    if manage_file.exists():
-        return FileResponse(str(manage_file))
+    if manage_html:
+        return _page_response(request, manage_html)
     return HTMLResponse(content="<h1>Management Page Not Found</h1>", status_code=404)
@@ -4,28 +4,38 @@
 """
 import os
 import sys
+import shutil
 import subprocess
 # 修复 Windows 上 playwright 的 asyncio 兼容性问题
 os.environ.setdefault("PLAYWRIGHT_BROWSERS_PATH", "0")
 
 import asyncio
+import functools
+import itertools
 import time
 import re
 import random
+import warnings
+from collections import deque
+from contextlib import suppress
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Deque
 from datetime import datetime
-from urllib.parse import urlparse, unquote, parse_qs
+from urllib.parse import unquote
 
 from ..core.logger import debug_logger
 from ..core.config import config
 
 
 # ==================== Docker 环境检测 ====================
+# 环境探测只在导入时执行一次，后续直接读取模块级常量
+IS_REPLIT = bool(os.environ.get('REPL_ID') or os.environ.get('REPL_SLUG'))
+
+
 def _is_running_in_docker() -> bool:
     """检测是否在 Docker 容器中运行"""
     # Replit 环境有 /.dockerenv 但不是真正的 Docker，支持浏览器运行
-    if os.environ.get('REPL_ID') or os.environ.get('REPL_SLUG'):
+    if IS_REPLIT:
         return False
     # 方法1: 检查 /.dockerenv 文件
     if os.path.exists('/.dockerenv'):
@@ -36,7 +46,7 @@ def _is_running_in_docker() -> bool:
             content = f.read()
             if 'docker' in content or 'kubepods' in content or 'containerd' in content:
                 return True
-    except:
+    except OSError:
         pass
     # 方法3: 检查环境变量
     if os.environ.get('DOCKER_CONTAINER') or os.environ.get('KUBERNETES_SERVICE_HOST'):
@@ -45,31 +55,11 @@ def _is_running_in_docker() -> bool:
 
 
 IS_DOCKER = _is_running_in_docker()
+# Replit: 使用系统 chromium（PATH 查找结果同样只计算一次）
+REPLIT_CHROME_PATH = shutil.which('chromium') if IS_REPLIT else None
 
 
 # ==================== playwright 自动安装 ====================
-def _run_pip_install(package: str, use_mirror: bool = False) -> bool:
-    """运行 pip install 命令"""
-    cmd = [sys.executable, '-m', 'pip', 'install', package]
-    if use_mirror:
-        cmd.extend(['-i', 'https://pypi.tuna.tsinghua.edu.cn/simple'])
-    
-    try:
-        debug_logger.log_info(f"[BrowserCaptcha] 正在安装 {package}...")
-        print(f"[BrowserCaptcha] 正在安装 {package}...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        if result.returncode == 0:
-            debug_logger.log_info(f"[BrowserCaptcha] ✅ {package} 安装成功")
-            print(f"[BrowserCaptcha] ✅ {package} 安装成功")
-            return True
-        else:
-            debug_logger.log_warning(f"[BrowserCaptcha] {package} 安装失败: {result.stderr[:200]}")
-            return False
-    except Exception as e:
-        debug_logger.log_warning(f"[BrowserCaptcha] {package} 安装异常: {e}")
-        return False
-
-
 def _run_playwright_install(use_mirror: bool = False) -> bool:
     """安装 playwright chromium 浏览器"""
     cmd = [sys.executable, '-m', 'playwright', 'install', 'chromium']
@@ -95,35 +85,42 @@ def _run_playwright_install(use_mirror: bool = False) -> bool:
         return False
 
 
-def _ensure_playwright_installed() -> bool:
-    """确保 playwright 已安装"""
+# playwright 安装的 chromium 可执行文件相对浏览器目录的位置（各平台）
+_CHROMIUM_EXECUTABLE_GLOBS = (
+    "chromium-*/chrome-linux/chrome",
+    "chromium-*/chrome-linux64/chrome",
+    "chromium-*/chrome-win/chrome.exe",
+    "chromium-*/chrome-win64/chrome.exe",
+    "chromium-*/chrome-mac/Chromium.app",
+    "chromium-*/chrome-mac-arm64/Chromium.app",
+)
+
+
+def _fast_browser_present() -> bool:
+    """直接检查 playwright 浏览器目录，避免为读取 executable_path 启动 driver 子进程"""
+    browsers_path = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if browsers_path == "0":
+        # "0" 表示浏览器安装在 playwright 包目录内
+        try:
+            import playwright
+        except ImportError:
+            return False
+        base = Path(playwright.__file__).parent / "driver" / "package" / ".local-browsers"
+    elif browsers_path:
+        base = Path(browsers_path)
+    else:
+        base = Path.home() / ".cache" / "ms-playwright"
     try:
-        import playwright
-        debug_logger.log_info("[BrowserCaptcha] playwright 已安装")
-        return True
-    except ImportError:
-        pass
-    
-    debug_logger.log_info("[BrowserCaptcha] playwright 未安装，开始自动安装...")
-    print("[BrowserCaptcha] playwright 未安装，开始自动安装...")
-    
-    # 先尝试官方源
-    if _run_pip_install('playwright', use_mirror=False):
-        return True
-    
-    # 官方源失败，尝试国内镜像
-    debug_logger.log_info("[BrowserCaptcha] 官方源安装失败，尝试国内镜像...")
-    print("[BrowserCaptcha] 官方源安装失败，尝试国内镜像...")
-    if _run_pip_install('playwright', use_mirror=True):
-        return True
-    
-    debug_logger.log_error("[BrowserCaptcha] ❌ playwright 自动安装失败，请手动安装: pip install playwright")
-    print("[BrowserCaptcha] ❌ playwright 自动安装失败，请手动安装: pip install playwright")
-    return False
+        return any(any(base.glob(pattern)) for pattern in _CHROMIUM_EXECUTABLE_GLOBS)
+    except OSError:
+        return False
 
 
 def _ensure_browser_installed() -> bool:
     """确保 chromium 浏览器已安装"""
+    if _fast_browser_present():
+        debug_logger.log_info("[BrowserCaptcha] chromium 浏览器已安装")
+        return True
     try:
         from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
@@ -153,6 +150,23 @@ def _ensure_browser_installed() -> bool:
     return False
 
 
+# chromium 安装检测只在首次创建服务时执行一次（不在导入时启动 driver 子进程）
+_browser_verified = False
+_browser_verify_lock = asyncio.Lock()
+
+
+async def _ensure_browser_installed_once():
+    """首次使用时在线程中检测/安装 chromium，结果缓存到模块级标记"""
+    global _browser_verified
+    if _browser_verified:
+        return
+    async with _browser_verify_lock:
+        if _browser_verified:
+            return
+        # sync_playwright 不能在事件循环线程中运行，放到工作线程执行
+        _browser_verified = await asyncio.to_thread(_ensure_browser_installed)
+
+
 # 尝试导入 patchright，fallback 到 playwright
 async_playwright = None
 Route = None
@@ -179,32 +193,113 @@ else:
             BROWSER_ENGINE = "playwright"
             debug_logger.log_info(f"[BrowserCaptcha] 引擎加载成功: {BROWSER_ENGINE}")
             print(f"[BrowserCaptcha] ✅ 引擎加载成功: {BROWSER_ENGINE}")
-            _ensure_browser_installed()
         except ImportError:
             debug_logger.log_error("[BrowserCaptcha] patchright 和 playwright 均未安装")
             print("[BrowserCaptcha] ❌ patchright 和 playwright 均未安装")
 
 
+# 共享的 playwright driver：启动 driver 子进程开销较大，只在首次打码时启动，服务关闭时停止
+_playwright_instance = None
+_playwright_lock = asyncio.Lock()
+
+
+async def _get_playwright():
+    """获取（必要时启动）共享的 playwright driver"""
+    global _playwright_instance
+    if _playwright_instance is not None:
+        return _playwright_instance
+    async with _playwright_lock:
+        if _playwright_instance is None:
+            _playwright_instance = await async_playwright().start()
+        return _playwright_instance
+
+
+async def _stop_playwright(instance=None):
+    """停止共享 driver；传入 instance 时仅在它仍是当前实例时才停止"""
+    global _playwright_instance
+    async with _playwright_lock:
+        current = _playwright_instance
+        if current is None or (instance is not None and instance is not current):
+            return
+        _playwright_instance = None
+    try:
+        await current.stop()
+    except Exception:
+        pass
+
+
+# 打码配置短时缓存：浏览器启动时读取代理设置，突发打码请求共享同一次 DB 查询
+_CAPTCHA_CFG_TTL = 5.0
+_captcha_cfg_cache: tuple = (0.0, None)
+_captcha_cfg_lock = asyncio.Lock()
+
+
+async def _get_captcha_config_cached(db, ttl: float = _CAPTCHA_CFG_TTL):
+    global _captcha_cfg_cache
+    fetched_at, cached = _captcha_cfg_cache
+    if cached is not None and time.monotonic() - fetched_at < ttl:
+        return cached
+    async with _captcha_cfg_lock:
+        fetched_at, cached = _captcha_cfg_cache
+        if cached is not None and time.monotonic() - fetched_at < ttl:
+            return cached
+        cached = await db.get_captcha_config()
+        _captcha_cfg_cache = (time.monotonic(), cached)
+        return cached
+
+
+def invalidate_captcha_config_cache():
+    """打码配置更新后调用，使下一次浏览器启动重新读取数据库"""
+    global _captcha_cfg_cache
+    _captcha_cfg_cache = (0.0, None)
+
+
 # 配置
 LABS_URL = "https://labs.google/fx/tools/flow"
+# reCAPTCHA 脚本域名 (primary, secondary)，按是否启用浏览器代理索引：代理时优先 recaptcha.net
+_RECAPTCHA_HOSTS = (
+    ("https://www.google.com", "https://www.recaptcha.net"),
+    ("https://www.recaptcha.net", "https://www.google.com"),
+)
 
 # ==========================================
 # 代理解析工具函数
 # ==========================================
-def parse_proxy_url(proxy_url: str) -> Optional[Dict[str, str]]:
-    """解析代理URL"""
-    if not proxy_url: return None
-    if not re.match(r'^(http|https|socks5)://', proxy_url): proxy_url = f"http://{proxy_url}"
-    match = re.match(r'^(socks5|http|https)://(?:([^:]+):([^@]+)@)?([^:]+):(\d+)$', proxy_url)
+_PROXY_SCHEME_PREFIXES = ("http://", "https://", "socks5://")
+
+# scheme://[user:pass@]host:port；密码可包含 / ? # 等字符，端口只要求是数字（与 Chromium 代理参数的旧解析保持一致）
+_PROXY_URL_RE = re.compile(r'^(socks5|http|https)://(?:([^:]+):([^@]+)@)?([^:]+):(\d+)$')
+
+def _split_proxy_url(proxy_url: str) -> Optional[tuple]:
+    """拆分 scheme://[user:pass@]host:port，格式不符时返回 None
+
+    Returns:
+        (protocol, username, password, host, port)
+    """
+    match = _PROXY_URL_RE.match(proxy_url)
+    return match.groups() if match else None
+
+@functools.lru_cache(maxsize=64)
+def _parse_proxy_url_cached(proxy_url: str) -> Optional[tuple]:
+    """解析代理URL，结果以不可变的 (key, value) 元组缓存（代理地址基数很低）"""
+    if not proxy_url.startswith(_PROXY_SCHEME_PREFIXES): proxy_url = f"http://{proxy_url}"
+    match = _split_proxy_url(proxy_url)
     if match:
-        protocol, username, password, host, port = match.groups()
-        proxy_config = {'server': f'{protocol}://{host}:{port}'}
+        protocol, username, password, host, port = match
+        proxy_config = (('server', f'{protocol}://{host}:{port}'),)
         if username and password:
-            proxy_config['username'] = username
-            proxy_config['password'] = password
+            proxy_config += (('username', username), ('password', password))
         return proxy_config
     return None
 
+def parse_proxy_url(proxy_url: str) -> Optional[Dict[str, str]]:
+    """解析代理URL"""
+    if not proxy_url: return None
+    proxy_config = _parse_proxy_url_cached(proxy_url)
+    # 每次返回新的 dict，调用方可以放心修改
+    return dict(proxy_config) if proxy_config else None
+
+@functools.lru_cache(maxsize=64)
 def normalize_browser_proxy_url(proxy_url: str) -> tuple[Optional[str], Optional[str]]:
     """将浏览器代理标准化为 Playwright/Chromium 可接受的格式。
 
@@ -219,13 +314,13 @@ def normalize_browser_proxy_url(proxy_url: str) -> tuple[Optional[str], Optional
         return None, None
 
     proxy_url = proxy_url.strip()
-    match = re.match(r'^(socks5|http|https)://(?:([^:]+):([^@]+)@)?([^:]+):(\d+)$', proxy_url)
+    match = _split_proxy_url(proxy_url)
     if not match:
-        if not re.match(r'^(http|https|socks5)://', proxy_url):
+        if not proxy_url.startswith(_PROXY_SCHEME_PREFIXES):
             proxy_url = f"http://{proxy_url}"
         return proxy_url, None
 
-    protocol, username, password, host, port = match.groups()
+    protocol, username, password, host, port = match
     if protocol == "socks5" and username and password:
         normalized = f"http://{username}:{password}@{host}:{port}"
         warning = (
@@ -239,110 +334,463 @@ def normalize_browser_proxy_url(proxy_url: str) -> tuple[Optional[str], Optional
 
 def validate_browser_proxy_url(proxy_url: str) -> tuple[bool, str]:
     if not proxy_url: return True, None
-    normalized_proxy_url, _ = normalize_browser_proxy_url(proxy_url)
-    parsed = parse_proxy_url(normalized_proxy_url)
-    if not parsed: return False, "代理格式错误"
+    # 等价于 normalize + parse，但只做一次完整匹配：
+    # SOCKS5 认证降级后的 http 地址与原地址分组相同，不影响校验结果。
+    # 复用 parse 的 lru_cache，同一地址重复校验时不再重新拆分
+    if _parse_proxy_url_cached(proxy_url.strip()) is None: return False, "代理格式错误"
     return True, None
 
+# 浏览器 UA 池（模块级不可变元组，每次启动浏览器时随机选取）
+# UA ???? 2026-03-01 ??????? score >= 0.3 ? UA?
+_RAW_UAS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 Edg/130.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 Edg/128.0.0.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36 Edg/131.0.2903.146",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36 Edg/130.0.2849.142",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36 Edg/129.0.2792.124",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36 Edg/128.0.2739.111",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:134.0) Gecko/20100101 Firefox/134.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:132.0) Gecko/20100101 Firefox/132.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_3_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.2 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 Edg/130.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 Edg/128.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36 Edg/131.0.2903.146",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36 Edg/130.0.2849.142",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36 Edg/129.0.2792.124",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36 Edg/128.0.2739.111",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:134.0) Gecko/20100101 Firefox/134.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.3; rv:133.0) Gecko/20100101 Firefox/133.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.2; rv:132.0) Gecko/20100101 Firefox/132.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.1; rv:131.0) Gecko/20100101 Firefox/131.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:129.0) Gecko/20100101 Firefox/129.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:128.0) Gecko/20100101 Firefox/128.0",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8 Pro) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.163 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.260 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; M2102J20SG) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 11; M2012K11AC) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.260 Mobile Safari/537.36 EdgA/131.0.2903.146",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Mobile Safari/537.36 EdgA/130.0.2849.142",
+    "Mozilla/5.0 (Linux; Android 12; M2102J20SG) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Mobile Safari/537.36 EdgA/129.0.2792.124",
+    "Mozilla/5.0 (Linux; Android 11; M2012K11AC) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Mobile Safari/537.36 EdgA/128.0.2739.111",
+    "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/28.0 Chrome/132.0.6834.163 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-S9110) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/27.0 Chrome/130.0.6723.172 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; SM-G9910) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/26.0 Chrome/128.0.6613.186 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/132.0.6834.95 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/131.0.6778.112 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) EdgiOS/132.2957.171 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) EdgiOS/131.2903.146 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 OPR/117.0.0.0",
+)
+
+# 分辨率池
+_RES_TUPLE = (
+    (1920, 1080), (2560, 1440), (3840, 2160), (1366, 768), (1536, 864),
+    (1600, 900), (1280, 720), (1360, 768), (1920, 1200),
+    (1440, 900), (1680, 1050), (1280, 800), (2560, 1600),
+    (2880, 1800), (3024, 1890), (3456, 2160),
+    (1280, 1024), (1024, 768), (1400, 1050),
+    (1920, 1280), (2736, 1824), (2880, 1920), (3000, 2000),
+    (2256, 1504), (2496, 1664), (3240, 2160),
+    (3200, 1800), (2304, 1440), (1800, 1200),
+)
+# 去重（保序）后冻结；平台/移动端标记在导入时解析一次，启动浏览器时按下标直接取用
+_UA_TUPLE = tuple(dict.fromkeys(_RAW_UAS))
+_UA_PLATFORM_RE = re.compile(r"\((Windows|Macintosh|iPhone|Linux; Android|Linux)")
+_UA_PLATFORM_NAMES = {
+    "Windows": "Windows",
+    "Macintosh": "macOS",
+    "iPhone": "iOS",
+    "Linux; Android": "Android",
+    "Linux": "Linux",
+}
+
+
+def _ua_meta(ua: str) -> tuple:
+    """返回 (ua, 平台, 是否移动端, 是否会发送 sec-ch-ua 客户端提示头)"""
+    match = _UA_PLATFORM_RE.search(ua)
+    platform = _UA_PLATFORM_NAMES[match.group(1)] if match else ""
+    # 只有 Chromium 内核（iOS 上的 CriOS/EdgiOS 实为 WebKit）才会发送客户端提示头
+    return ua, platform, platform in ("Android", "iOS"), "Chrome/" in ua
+
+
+_UA_META = tuple(_ua_meta(ua) for ua in _UA_TUPLE)
+_UA_N = len(_UA_TUPLE)
+_RES_N = len(_RES_TUPLE)
+
+# ==========================================
+# 页面内脚本：模块级常量，通过 add_init_script 注入一次，之后只需调用 window 上的函数
+# ==========================================
+_FINGERPRINT_JS = r"""
+    () => {
+        const ua = navigator.userAgent || "";
+        const lang = navigator.language || "";
+        const uaData = navigator.userAgentData || null;
+        let secChUa = "";
+        let secChUaMobile = "";
+        let secChUaPlatform = "";
+
+        if (uaData) {
+            if (Array.isArray(uaData.brands) && uaData.brands.length > 0) {
+                secChUa = uaData.brands
+                    .map((item) => `"${item.brand}";v="${item.version}"`)
+                    .join(", ");
+            }
+            secChUaMobile = uaData.mobile ? "?1" : "?0";
+            if (uaData.platform) {
+                secChUaPlatform = `"${uaData.platform}"`;
+            }
+        }
+
+        return {
+            user_agent: ua,
+            accept_language: lang,
+            sec_ch_ua: secChUa,
+            sec_ch_ua_mobile: secChUaMobile,
+            sec_ch_ua_platform: secChUaPlatform,
+        };
+    }
+"""
+
+# 正则放在外层闭包中，只在注入时编译一次，每次轮询直接复用
+_SCORE_SCRAPE_FACTORY_JS = r"""
+    (() => {
+        const _SCORE_PATTERNS = [
+            { source: "current_score", regex: /Your score is:\s*([01](?:\.\d+)?)/i },
+            { source: "selected_score", regex: /Selected Score Test:[\s\S]{0,400}?Score:\s*([01](?:\.\d+)?)/i },
+            { source: "history_score", regex: /(?:^|\n)\s*Score:\s*([01](?:\.\d+)?)\s*;/i },
+        ];
+        const _NBSP_RE = /\u00a0/g;
+        const _CR_RE = /\r/g;
+        const _UA_RE = /Current User Agent:\s*([^\n]+)/i;
+        const _IP_RE = /Current IP Address:\s*([^\n]+)/i;
+
+        return (includeRawText) => {
+            const bodyText = ((document.body && document.body.innerText) || "")
+                .replace(_NBSP_RE, " ")
+                .replace(_CR_RE, "");
+            let score = null;
+            let source = "";
+            for (const item of _SCORE_PATTERNS) {
+                const match = bodyText.match(item.regex);
+                if (!match) continue;
+                const parsed = Number(match[1]);
+                if (!Number.isNaN(parsed) && parsed >= 0 && parsed <= 1) {
+                    score = parsed;
+                    source = item.source;
+                    break;
+                }
+            }
+            const uaMatch = bodyText.match(_UA_RE);
+            const ipMatch = bodyText.match(_IP_RE);
+            const result = {
+                score,
+                source,
+                current_user_agent: uaMatch ? uaMatch[1].trim() : "",
+                current_ip_address: ipMatch ? ipMatch[1].trim() : "",
+                title: document.title || "",
+                url: location.href || "",
+            };
+            // 原文截取与指纹只在命中分数或显式要求（超时快照）时生成，监听过程中的检查不做这些额外工作
+            if (score !== null || includeRawText) {
+                result.raw_text = bodyText.slice(0, 4000);
+                result.fingerprint = window.__flow_fp ? window.__flow_fp() : null;
+            }
+            return result;
+        };
+    })()
+"""
+
+_REFRESH_SCORE_JS = r"""
+    () => {
+        const nodes = Array.from(
+            document.querySelectorAll('button, input[type="button"], input[type="submit"], a')
+        );
+        const target = nodes.find((node) => {
+            const text = (node.innerText || node.textContent || node.value || "").trim();
+            return /Refresh score now!?/i.test(text);
+        });
+        if (target) {
+            target.click();
+            return true;
+        }
+        return false;
+    }
+"""
+
+# 分数监听：页面 DOM 变化时才重新读取分数，命中后置 __flow_score_ready，Python 侧只需等待该标记
+_SCORE_WATCH_JS = r"""
+    (refreshDelayMs) => {
+        if (window.__flow_score_watching) return true;
+        window.__flow_score_watching = true;
+        window.__flow_score_ready = false;
+        window.__flow_score_result = null;
+        let observer = null;
+        let pending = false;
+        const check = () => {
+            pending = false;
+            if (window.__flow_score_ready) return;
+            const result = window.__flow_score();
+            window.__flow_score_result = result;
+            if (typeof result.score === "number") {
+                window.__flow_score_ready = true;
+                if (observer) observer.disconnect();
+            }
+        };
+        check();
+        if (window.__flow_score_ready) return true;
+        observer = new MutationObserver(() => {
+            if (pending) return;
+            pending = true;
+            setTimeout(check, 50);
+        });
+        observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+        setTimeout(() => {
+            if (window.__flow_score_ready) return;
+            try {
+                window.__flow_refresh_score();
+            } catch (e) {}
+        }, Math.max(0, refreshDelayMs || 0));
+        return true;
+    }
+"""
+
+# 页面辅助函数安装脚本：既作为 init script 注入，也可在未生效时直接 evaluate 补装
+_INSTALL_HELPERS_JS = (
+    "() => {\n"
+    "window.__flow_fp = " + _FINGERPRINT_JS.strip() + ";\n"
+    "window.__flow_score = " + _SCORE_SCRAPE_FACTORY_JS.strip() + ";\n"
+    "window.__flow_refresh_score = " + _REFRESH_SCORE_JS.strip() + ";\n"
+    "window.__flow_watch_score = " + _SCORE_WATCH_JS.strip() + ";\n"
+    "}"
+)
+_PAGE_INIT_JS = (
+    "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});\n"
+    "(" + _INSTALL_HELPERS_JS + ")();\n"
+)
+_START_SCORE_WATCH_JS = "(delay) => (window.__flow_watch_score ? window.__flow_watch_score(delay) : false)"
+_SCORE_READY_JS = "() => window.__flow_score_ready === true"
+_SCORE_RESULT_JS = "() => window.__flow_score_result || null"
+# 与页面脚本一致的分数正则（Python 侧兜底解析 raw_text 时使用）
+_SCORE_RES = (
+    ("current_score", re.compile(r"Your score is:\s*([01](?:\.\d+)?)", re.I)),
+    ("selected_score", re.compile(r"Selected Score Test:[\s\S]{0,400}?Score:\s*([01](?:\.\d+)?)", re.I)),
+    ("history_score", re.compile(r"(?:^|\n)\s*Score:\s*([01](?:\.\d+)?)\s*;", re.I)),
+)
+
+
+def _extract_score(text: str) -> Optional[tuple]:
+    """从页面文本中解析分数，返回 (score, source)"""
+    if not text:
+        return None
+    text = text.replace("\u00a0", " ").replace("\r", "")
+    for source, pattern in _SCORE_RES:
+        match = pattern.search(text)
+        if not match:
+            continue
+        try:
+            score = float(match.group(1))
+        except ValueError:
+            continue
+        if 0 <= score <= 1:
+            return score, source
+    return None
+
+
+# 自定义打码的 reCAPTCHA 变体：(脚本路径, execute 函数, ready 函数, 就绪判断表达式, 日志标签)
+_RECAPTCHA_ENTERPRISE_API = (
+    "recaptcha/enterprise.js",
+    "grecaptcha.enterprise.execute",
+    "grecaptcha.enterprise.ready",
+    "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && "
+    "typeof grecaptcha.enterprise.execute === 'function'",
+    "enterprise.js",
+)
+_RECAPTCHA_V3_API = (
+    "recaptcha/api.js",
+    "grecaptcha.execute",
+    "grecaptcha.ready",
+    "typeof grecaptcha !== 'undefined' && typeof grecaptcha.execute === 'function'",
+    "api.js",
+)
+
+# 打码页面放行/关注的资源域名（子串匹配，一次正则扫描代替逐个 in 判断）
+_RECAPTCHA_DOMAINS_RE = re.compile(r"google\.com|gstatic\.com|recaptcha\.net")
+# 不包含上述任一域名的 URL（作为路由模式交给浏览器端匹配，需兼容 JS 正则语法）
+_NON_RECAPTCHA_URL_RE = re.compile(r"^(?!.*(?:google\.com|gstatic\.com|recaptcha\.net))")
+_RECAPTCHA_DOMAINS_RE_CUSTOM = re.compile(r"google\.com|gstatic\.com|recaptcha\.net|antcpt\.com")
+# reload/clr 请求的 k= 参数（只看 ? 之后、# 之前的查询串）
+_K_PARAM_RE = re.compile(r"[?&]k=([^&#]+)")
+
+# Flow 打码页面：拦截项目页后返回的极简 HTML，只负责依次尝试加载 enterprise.js
+_BOOTSTRAP_HTML_TEMPLATE = """<html><head><script>
+    (() => {
+        const urls = [
+            '%(primary)s/recaptcha/enterprise.js?render=%(key)s',
+            '%(secondary)s/recaptcha/enterprise.js?render=%(key)s'
+        ];
+        const loadScript = (index) => {
+            if (index >= urls.length) return;
+            const script = document.createElement('script');
+            script.src = urls[index];
+            script.async = true;
+            script.onerror = () => loadScript(index + 1);
+            document.head.appendChild(script);
+        };
+        loadScript(0);
+    })();
+    </script></head><body></body></html>"""
+
+
+@functools.lru_cache(maxsize=128)
+def _build_bootstrap_html(primary_host: str, secondary_host: str, website_key: str) -> bytes:
+    return (_BOOTSTRAP_HTML_TEMPLATE % {
+        "primary": primary_host,
+        "secondary": secondary_host,
+        "key": website_key,
+    }).encode("utf-8")
+
+
+# 自定义站点 grecaptcha 未就绪时补注入脚本（URL 通过参数传入，脚本本身不变）
+_INJECT_RECAPTCHA_JS = """
+    ([primaryUrl, secondaryUrl]) => {
+        const existing = Array.from(document.scripts || []).some((script) => {
+            const src = script?.src || "";
+            return src.includes('/recaptcha/');
+        });
+        if (existing) return;
+        const urls = [primaryUrl, secondaryUrl];
+        const loadScript = (index) => {
+            if (index >= urls.length) return;
+            const script = document.createElement('script');
+            script.src = urls[index];
+            script.async = true;
+            script.onerror = () => loadScript(index + 1);
+            document.head.appendChild(script);
+        };
+        loadScript(0);
+    }
+"""
+
+# 自定义打码预热：聚焦、合成 mousemove、滚动，并顺带返回指纹
+_WARMUP_AND_FINGERPRINT_JS = """
+    () => {
+        try {
+            window.focus();
+            window.dispatchEvent(new Event('focus'));
+            document.dispatchEvent(new MouseEvent('mousemove', {
+                bubbles: true,
+                clientX: Math.max(32, Math.floor((window.innerWidth || 1280) * 0.4)),
+                clientY: Math.max(32, Math.floor((window.innerHeight || 720) * 0.35))
+            }));
+            window.scrollTo(0, Math.min(280, document.body?.scrollHeight || 280));
+        } catch (e) {}
+        return window.__flow_fp ? window.__flow_fp() : null;
+    }
+"""
+
+_FINGERPRINT_KEYS = ("user_agent", "accept_language", "sec_ch_ua", "sec_ch_ua_mobile", "sec_ch_ua_platform")
+_CALL_FINGERPRINT_JS = "() => (window.__flow_fp ? window.__flow_fp() : null)"
+_CALL_SCORE_JS = "() => (window.__flow_score ? window.__flow_score(true) : null)"
+
+
+def _config_number(name: str, default, cast):
+    """读取数值配置，缺失或非法时回退默认值"""
+    try:
+        return cast(getattr(config, name, default) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+class _NetworkQuietTracker:
+    """统计页面进行中的请求数，用于"网络空闲"等待（只看当前时刻之后的静默，而不是页面加载时的 networkidle 事件）"""
+
+    def __init__(self, page):
+        self._inflight = 0
+        self._last_activity = time.monotonic()
+        page.on("request", self._on_start)
+        page.on("requestfinished", self._on_end)
+        page.on("requestfailed", self._on_end)
+
+    def _on_start(self, _request):
+        self._inflight += 1
+        self._last_activity = time.monotonic()
+
+    def _on_end(self, _request):
+        self._inflight = max(0, self._inflight - 1)
+        self._last_activity = time.monotonic()
+
+    async def wait(self, max_wait: float, quiet: float = 0.5) -> float:
+        """等到没有进行中的请求且已静默 quiet 秒，最多等待 max_wait 秒；返回实际等待时长"""
+        started_at = time.monotonic()
+        deadline = started_at + max_wait
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if self._inflight == 0 and now - self._last_activity >= quiet:
+                break
+            await asyncio.sleep(min(0.1, deadline - now))
+        return time.monotonic() - started_at
+
+
+# 浏览器进程复用：超过存活时长、累计 context 数、连续失败过多或空闲过久时回收重启
+_BROWSER_MAX_AGE_SECONDS = 600
+_BROWSER_IDLE_SECONDS = 300
+_BROWSER_MAX_ERRORS = 3
+BROWSER_POOL_RECYCLE_AFTER = 100
+# 服务关闭时单个浏览器的关闭上限，超时后交由 driver 停止时一并回收
+_BROWSER_CLOSE_TIMEOUT_SECONDS = 10.0
+
+
 class TokenBrowser:
-    """简化版浏览器：每次获取 token 时启动新浏览器，用完即关
+    """简化版浏览器：Chromium 进程在同一 Token 的多次打码间复用，每次打码新建 context
     
-    每次都是新的随机 UA，避免长时间运行导致的各种问题
+    每个 context 都是新的随机 UA / 视口；进程定期回收，避免长时间运行导致的各种问题
     """
-    # UA ???? 2026-03-01 ??????? score >= 0.3 ? UA?
-    UA_LIST = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 Edg/130.0.0.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 Edg/128.0.0.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36 Edg/131.0.2903.146",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36 Edg/130.0.2849.142",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36 Edg/129.0.2792.124",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36 Edg/128.0.2739.111",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:134.0) Gecko/20100101 Firefox/134.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:132.0) Gecko/20100101 Firefox/132.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_3_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_2_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.2 Safari/605.1.15",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.6 Safari/605.1.15",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36 Edg/130.0.0.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36 Edg/129.0.0.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36 Edg/128.0.0.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.265 Safari/537.36 Edg/131.0.2903.146",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Safari/537.36 Edg/130.0.2849.142",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Safari/537.36 Edg/129.0.2792.124",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Safari/537.36 Edg/128.0.2739.111",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:134.0) Gecko/20100101 Firefox/134.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.3; rv:133.0) Gecko/20100101 Firefox/133.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.2; rv:132.0) Gecko/20100101 Firefox/132.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.1; rv:131.0) Gecko/20100101 Firefox/131.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:129.0) Gecko/20100101 Firefox/129.0",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:128.0) Gecko/20100101 Firefox/128.0",
-        "Mozilla/5.0 (Linux; Android 14; Pixel 8 Pro) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.163 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.260 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 12; M2102J20SG) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 11; M2012K11AC) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.6778.260 Mobile Safari/537.36 EdgA/131.0.2903.146",
-        "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.6723.172 Mobile Safari/537.36 EdgA/130.0.2849.142",
-        "Mozilla/5.0 (Linux; Android 12; M2102J20SG) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.6668.177 Mobile Safari/537.36 EdgA/129.0.2792.124",
-        "Mozilla/5.0 (Linux; Android 11; M2012K11AC) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.6613.186 Mobile Safari/537.36 EdgA/128.0.2739.111",
-        "Mozilla/5.0 (Linux; Android 14; SM-S9180) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/28.0 Chrome/132.0.6834.163 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 13; SM-S9110) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/27.0 Chrome/130.0.6723.172 Mobile Safari/537.36",
-        "Mozilla/5.0 (Linux; Android 12; SM-G9910) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/26.0 Chrome/128.0.6613.186 Mobile Safari/537.36",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.1 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/132.0.6834.95 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/131.0.6778.112 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) EdgiOS/132.2957.171 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 18_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) EdgiOS/131.2903.146 Mobile/15E148 Safari/604.1",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_6_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 Edg/132.0.2957.171",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.210 Safari/537.36 OPR/117.0.0.0",
-    ]
-    
-    # 分辨率池
-    RESOLUTIONS = [
-        (1920, 1080), (2560, 1440), (3840, 2160), (1366, 768), (1536, 864),
-        (1600, 900), (1280, 720), (1360, 768), (1920, 1200),
-        (1440, 900), (1680, 1050), (1280, 800), (2560, 1600),
-        (2880, 1800), (3024, 1890), (3456, 2160),
-        (1280, 1024), (1024, 768), (1400, 1050),
-        (1920, 1280), (2736, 1824), (2880, 1920), (3000, 2000),
-        (2256, 1504), (2496, 1664), (3240, 2160),
-        (3200, 1800), (2304, 1440), (1800, 1200),
-    ]
-    
+    UA_LIST = _UA_TUPLE
+    RESOLUTIONS = _RES_TUPLE
+
     def __init__(self, token_id: int, user_data_dir: str, db=None):
         self.token_id = token_id
         self.user_data_dir = user_data_dir
@@ -353,20 +801,35 @@ class TokenBrowser:
         self._last_fingerprint: Optional[Dict[str, Any]] = None
         self._browser_proxy_active = False
         # 打码成功后延迟关闭浏览器：等待上游图片/视频请求完成通知
-        self._pending_release_events: List[asyncio.Event] = []
-        self._pending_release_tasks: List[asyncio.Task] = []
+        self._pending_release_events: Deque[asyncio.Event] = deque()
+        self._pending_release_tasks: Deque[asyncio.Task] = deque()
         self._pending_release_lock = asyncio.Lock()
+        # 复用的 Chromium 进程及其 context 计数；被回收的旧进程等其 context 全部关闭后再关
+        self._browser = None
+        self._browser_launched_at = 0.0
+        self._browser_proxy_url: Optional[str] = None
+        self._browser_error_base = 0
+        self._browser_context_uses = 0
+        self._browser_contexts: Dict[Any, int] = {}
+        self._idle_close_task: Optional[asyncio.Task] = None
+        self.refresh_config()
+
+    def refresh_config(self):
+        """读取打码相关的超时/等待配置并缓存到实例上，配置热更新后需重新调用"""
+        self._score_dom_wait = _config_number("browser_score_dom_wait_seconds", 25, float)
+        self._recaptcha_settle = _config_number("browser_recaptcha_settle_seconds", 3, float)
+        self._score_test_warmup = _config_number("browser_score_test_warmup_seconds", 12, float)
+        self._flow_timeout = _config_number("flow_timeout", 300, int)
+        self._upsample_timeout = _config_number("upsample_timeout", 300, int)
     
     async def _create_browser(self) -> tuple:
-        """创建新浏览器实例（新 UA），返回 (playwright, browser, context)"""
-        import random
-        
-        random_ua = random.choice(self.UA_LIST)
-        base_w, base_h = random.choice(self.RESOLUTIONS)
+        """复用（必要时启动）浏览器进程并新建 context（新 UA），返回 (playwright, browser, context)"""
+        random_ua, ua_platform, ua_is_mobile, ua_client_hints = _UA_META[random.randrange(_UA_N)]
+        base_w, base_h = _RES_TUPLE[random.randrange(_RES_N)]
         width, height = base_w, base_h - random.randint(0, 80)
         viewport = {"width": width, "height": height}
         
-        playwright = await async_playwright().start()
+        playwright = await _get_playwright()
         Path(self.user_data_dir).mkdir(parents=True, exist_ok=True)
         
         # 代理配置
@@ -375,7 +838,7 @@ class TokenBrowser:
         self._browser_proxy_active = False
         try:
             if self.db:
-                captcha_config = await self.db.get_captcha_config()
+                captcha_config = await _get_captcha_config_cached(self.db)
                 if captcha_config.browser_proxy_enabled and captcha_config.browser_proxy_url:
                     candidate_proxy_url = captcha_config.browser_proxy_url.strip()
                     normalized_proxy_url, proxy_warning = normalize_browser_proxy_url(candidate_proxy_url)
@@ -393,13 +856,15 @@ class TokenBrowser:
             "user_agent": random_ua,
             "proxy_url": raw_proxy_url if raw_proxy_url else None,
         }
+        if ua_client_hints:
+            self._last_fingerprint["sec_ch_ua_mobile"] = "?1" if ua_is_mobile else "?0"
+            if ua_platform:
+                self._last_fingerprint["sec_ch_ua_platform"] = f'"{ua_platform}"'
         
         try:
             # Replit: 使用 headless 模式和系统 chromium
-            import shutil
-            is_replit = bool(os.environ.get('REPL_ID') or os.environ.get('REPL_SLUG'))
-            headless_mode = True if is_replit else False
-            chrome_path = shutil.which('chromium') if is_replit else None
+            headless_mode = IS_REPLIT
+            chrome_path = REPLIT_CHROME_PATH
 
             launch_kwargs = {
                 'headless': headless_mode,
@@ -420,172 +885,117 @@ class TokenBrowser:
             }
             if chrome_path:
                 launch_kwargs['executable_path'] = chrome_path
-                debug_logger.log_info(f"[BrowserCaptcha] Token-{self.token_id} 使用系统 Chromium: {chrome_path}, headless={headless_mode}")
 
-            browser = await playwright.chromium.launch(**launch_kwargs)
-            context = await browser.new_context(
-                user_agent=random_ua,
-                viewport=viewport,
-            )
-            return playwright, browser, context
+            browser = await self._ensure_browser(playwright, launch_kwargs, raw_proxy_url)
+            self._cancel_idle_close()
+            self._browser_context_uses += 1
+            self._browser_contexts[browser] = self._browser_contexts.get(browser, 0) + 1
+            context = None
+            try:
+                context = await browser.new_context(
+                    user_agent=random_ua,
+                    viewport=viewport,
+                )
+                # webdriver 隐藏与页面辅助函数在 context 级注册一次，对其下所有页面/frame 生效
+                await context.add_init_script(_PAGE_INIT_JS)
+            except Exception:
+                if context is not None:
+                    with suppress(Exception):
+                        await context.close()
+                await self._release_browser_context(browser)
+                raise
+            # driver 为共享实例，不随单次打码停止，因此 playwright 位置返回 None
+            return None, browser, context
         except Exception as e:
             debug_logger.log_error(f"[BrowserCaptcha] Token-{self.token_id} 启动浏览器失败: {type(e).__name__}: {str(e)[:200]}")
-            # 确保清理已创建的对象
-            try:
-                if playwright:
-                    await playwright.stop()
-            except: pass
+            if "Connection closed" in str(e):
+                # driver 进程已退出，丢弃共享实例，下次打码重新启动
+                await _stop_playwright(playwright)
             raise
 
+    def _merge_fingerprint(self, fingerprint: Any) -> bool:
+        """把页面返回的 UA/客户端提示头合并进 _last_fingerprint，返回是否为有效指纹"""
+        if not isinstance(fingerprint, dict):
+            return False
+
+        if self._last_fingerprint is None:
+            self._last_fingerprint = {}
+
+        for key in _FINGERPRINT_KEYS:
+            value = fingerprint.get(key)
+            if isinstance(value, str) and value:
+                self._last_fingerprint[key] = value
+        return True
+
     async def _capture_page_fingerprint(self, page):
         """从浏览器页面提取 UA 与客户端提示头，确保与打码浏览器一致。"""
         try:
-            fingerprint = await page.evaluate("""
-                () => {
-                    const ua = navigator.userAgent || "";
-                    const lang = navigator.language || "";
-                    const uaData = navigator.userAgentData || null;
-                    let secChUa = "";
-                    let secChUaMobile = "";
-                    let secChUaPlatform = "";
-
-                    if (uaData) {
-                        if (Array.isArray(uaData.brands) && uaData.brands.length > 0) {
-                            secChUa = uaData.brands
-                                .map((item) => `"${item.brand}";v="${item.version}"`)
-                                .join(", ");
-                        }
-                        secChUaMobile = uaData.mobile ? "?1" : "?0";
-                        if (uaData.platform) {
-                            secChUaPlatform = `"${uaData.platform}"`;
-                        }
-                    }
-
-                    return {
-                        user_agent: ua,
-                        accept_language: lang,
-                        sec_ch_ua: secChUa,
-                        sec_ch_ua_mobile: secChUaMobile,
-                        sec_ch_ua_platform: secChUaPlatform,
-                    };
-                }
-            """)
-
-            if not isinstance(fingerprint, dict):
-                return
-
-            if self._last_fingerprint is None:
-                self._last_fingerprint = {}
+            fingerprint = await page.evaluate(_CALL_FINGERPRINT_JS)
+            if fingerprint is None:
+                # 初始化脚本未生效（如页面未导航），回退为直接执行完整脚本
+                fingerprint = await page.evaluate(_FINGERPRINT_JS)
 
-            for key in ("user_agent", "accept_language", "sec_ch_ua", "sec_ch_ua_mobile", "sec_ch_ua_platform"):
-                value = fingerprint.get(key)
-                if isinstance(value, str) and value:
-                    self._last_fingerprint[key] = value
+            self._merge_fingerprint(fingerprint)
         except Exception as e:
             debug_logger.log_warning(f"[BrowserCaptcha] Token-{self.token_id} 提取浏览器指纹失败: {type(e).__name__}: {str(e)[:200]}")
 
-    async def _verify_score_in_page(self, page, token: str, verify_url: str) -> Dict[str, Any]:
+    async def _verify_score_in_page(self, page) -> Dict[str, Any]:
         """直接读取测试页面展示的分数，避免 verify.php 与页面显示口径不一致。"""
-        _ = token
-        _ = verify_url
         started_at = time.time()
-        timeout_seconds = 25.0
-        refresh_clicked = False
+        timeout_seconds = self._score_dom_wait
         last_snapshot: Dict[str, Any] = {}
 
+        # 页内 MutationObserver 监听分数出现，避免每 500ms 一次 evaluate 轮询；2 秒后仍无分数则由页面自行点击刷新
+        result: Any = None
         try:
-            timeout_seconds = float(getattr(config, "browser_score_dom_wait_seconds", 25) or 25)
-        except Exception:
-            pass
-
-        while (time.time() - started_at) < timeout_seconds:
+            refresh_delay_ms = max(0, int((2 - (time.time() - started_at)) * 1000))
+            watching = await page.evaluate(_START_SCORE_WATCH_JS, refresh_delay_ms)
+            if not watching:
+                await page.evaluate(_INSTALL_HELPERS_JS)
+                await page.evaluate(_START_SCORE_WATCH_JS, refresh_delay_ms)
+            remaining = timeout_seconds - (time.time() - started_at)
+            if remaining > 0:
+                await page.wait_for_function(_SCORE_READY_JS, timeout=remaining * 1000)
+            result = await page.evaluate(_SCORE_RESULT_JS)
+            if not (isinstance(result, dict) and isinstance(result.get("score"), (int, float))):
+                result = await page.evaluate(_CALL_SCORE_JS)
+        except Exception as e:
             try:
-                result = await page.evaluate(
-                    """
-                        () => {
-                            const bodyText = ((document.body && document.body.innerText) || "")
-                                .replace(/\\u00a0/g, " ")
-                                .replace(/\\r/g, "");
-                            const patterns = [
-                                { source: "current_score", regex: /Your score is:\\s*([01](?:\\.\\d+)?)/i },
-                                { source: "selected_score", regex: /Selected Score Test:[\\s\\S]{0,400}?Score:\\s*([01](?:\\.\\d+)?)/i },
-                                { source: "history_score", regex: /(?:^|\\n)\\s*Score:\\s*([01](?:\\.\\d+)?)\\s*;/i },
-                            ];
-                            let score = null;
-                            let source = "";
-                            for (const item of patterns) {
-                                const match = bodyText.match(item.regex);
-                                if (!match) continue;
-                                const parsed = Number(match[1]);
-                                if (!Number.isNaN(parsed) && parsed >= 0 && parsed <= 1) {
-                                    score = parsed;
-                                    source = item.source;
-                                    break;
-                                }
-                            }
-                            const uaMatch = bodyText.match(/Current User Agent:\\s*([^\\n]+)/i);
-                            const ipMatch = bodyText.match(/Current IP Address:\\s*([^\\n]+)/i);
-                            return {
-                                score,
-                                source,
-                                raw_text: bodyText.slice(0, 4000),
-                                current_user_agent: uaMatch ? uaMatch[1].trim() : "",
-                                current_ip_address: ipMatch ? ipMatch[1].trim() : "",
-                                title: document.title || "",
-                                url: location.href || "",
-                            };
-                        }
-                    """
-                )
-            except Exception as e:
+                result = await page.evaluate(_CALL_SCORE_JS)
+            except Exception:
+                result = None
+            if not isinstance(result, dict):
                 result = {"error": f"{type(e).__name__}: {str(e)[:200]}"}
 
-            if isinstance(result, dict):
-                last_snapshot = result
-                score = result.get("score")
-                if isinstance(score, (int, float)):
-                    elapsed_ms = int((time.time() - started_at) * 1000)
-                    return {
-                        "verify_mode": "browser_page_dom",
-                        "verify_elapsed_ms": elapsed_ms,
-                        "verify_http_status": None,
-                        "verify_result": {
-                            "success": True,
-                            "score": score,
-                            "source": result.get("source") or "antcpt_dom",
-                            "raw_text": result.get("raw_text") or "",
-                            "current_user_agent": result.get("current_user_agent") or "",
-                            "current_ip_address": result.get("current_ip_address") or "",
-                            "page_title": result.get("title") or "",
-                            "page_url": result.get("url") or "",
-                        },
-                    }
-
-            if not refresh_clicked and (time.time() - started_at) >= 2:
-                refresh_clicked = True
-                try:
-                    await page.evaluate(
-                        """
-                            () => {
-                                const nodes = Array.from(
-                                    document.querySelectorAll('button, input[type="button"], input[type="submit"], a')
-                                );
-                                const target = nodes.find((node) => {
-                                    const text = (node.innerText || node.textContent || node.value || "").trim();
-                                    return /Refresh score now!?/i.test(text);
-                                });
-                                if (target) {
-                                    target.click();
-                                    return true;
-                                }
-                                return false;
-                            }
-                        """
-                    )
-                except Exception:
-                    pass
+        # 分数结果中已附带指纹，省去单独一次 evaluate；拿不到时再单独提取
+        if not (isinstance(result, dict) and self._merge_fingerprint(result.pop("fingerprint", None))):
+            await self._capture_page_fingerprint(page)
 
-            await asyncio.sleep(0.5)
+        if isinstance(result, dict):
+            last_snapshot = result
+            score = result.get("score")
+            if not isinstance(score, (int, float)):
+                # 页面脚本未命中时用超时快照的原文再解析一次
+                extracted = _extract_score(result.get("raw_text") or "")
+                if extracted:
+                    score, result["source"] = extracted
+            if isinstance(score, (int, float)):
+                elapsed_ms = int((time.time() - started_at) * 1000)
+                return {
+                    "verify_mode": "browser_page_dom",
+                    "verify_elapsed_ms": elapsed_ms,
+                    "verify_http_status": None,
+                    "verify_result": {
+                        "success": True,
+                        "score": score,
+                        "source": result.get("source") or "antcpt_dom",
+                        "raw_text": result.get("raw_text") or "",
+                        "current_user_agent": result.get("current_user_agent") or "",
+                        "current_ip_address": result.get("current_ip_address") or "",
+                        "page_title": result.get("title") or "",
+                        "page_url": result.get("url") or "",
+                    },
+                }
 
         elapsed_ms = int((time.time() - started_at) * 1000)
         if not isinstance(last_snapshot, dict):
@@ -608,20 +1018,84 @@ class TokenBrowser:
             },
         }
     
+    async def _ensure_browser(self, playwright, launch_kwargs: Dict[str, Any], proxy_url: Optional[str]):
+        """返回可复用的浏览器进程；代理变化、进程过老、连续失败或已断开时重新启动"""
+        browser = self._browser
+        if browser is not None:
+            recycle_reason = None
+            if not browser.is_connected():
+                recycle_reason = "连接已断开"
+            elif proxy_url != self._browser_proxy_url:
+                recycle_reason = "代理配置变化"
+            elif time.monotonic() - self._browser_launched_at > _BROWSER_MAX_AGE_SECONDS:
+                recycle_reason = f"已运行超过 {_BROWSER_MAX_AGE_SECONDS}s"
+            elif self._error_count - self._browser_error_base >= _BROWSER_MAX_ERRORS:
+                recycle_reason = f"连续失败 {self._error_count - self._browser_error_base} 次"
+            elif self._browser_context_uses >= BROWSER_POOL_RECYCLE_AFTER:
+                recycle_reason = f"已创建 {self._browser_context_uses} 个 context"
+            if recycle_reason is None:
+                return browser
+            debug_logger.log_info(f"[BrowserCaptcha] Token-{self.token_id} 回收浏览器进程: {recycle_reason}")
+            await self._retire_browser()
+
+        if launch_kwargs.get('executable_path'):
+            debug_logger.log_info(
+                f"[BrowserCaptcha] Token-{self.token_id} 使用系统 Chromium: {launch_kwargs['executable_path']}, headless={launch_kwargs['headless']}"
+            )
+        browser = await playwright.chromium.launch(**launch_kwargs)
+        self._browser = browser
+        self._browser_launched_at = time.monotonic()
+        self._browser_proxy_url = proxy_url
+        self._browser_error_base = self._error_count
+        self._browser_context_uses = 0
+        return browser
+
+    async def _retire_browser(self):
+        """摘下当前浏览器进程：没有使用中的 context 时立即关闭，否则等最后一个 context 关闭时再关"""
+        browser = self._browser
+        self._browser = None
+        self._cancel_idle_close()
+        if browser is not None and not self._browser_contexts.get(browser):
+            self._browser_contexts.pop(browser, None)
+            with suppress(Exception):
+                await browser.close()
+
+    async def _release_browser_context(self, browser):
+        """一个 context 结束：旧进程的最后一个 context 关闭时关掉旧进程，当前进程空闲时启动空闲回收计时"""
+        remaining = self._browser_contexts.get(browser, 0) - 1
+        if remaining > 0:
+            self._browser_contexts[browser] = remaining
+            return
+        self._browser_contexts.pop(browser, None)
+        if browser is not self._browser:
+            with suppress(Exception):
+                await browser.close()
+        elif self._idle_close_task is None or self._idle_close_task.done():
+            self._idle_close_task = asyncio.create_task(self._close_idle_browser())
+
+    def _cancel_idle_close(self):
+        task = self._idle_close_task
+        self._idle_close_task = None
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _close_idle_browser(self):
+        await asyncio.sleep(_BROWSER_IDLE_SECONDS)
+        if self._browser is not None and not self._browser_contexts.get(self._browser):
+            debug_logger.log_info(f"[BrowserCaptcha] Token-{self.token_id} 浏览器空闲超过 {_BROWSER_IDLE_SECONDS}s，关闭进程")
+            self._idle_close_task = None
+            await self._retire_browser()
+
     async def _close_browser(self, playwright, browser, context):
-        """关闭浏览器实例"""
-        try:
-            if context:
+        """关闭本次打码的 context；浏览器进程由复用逻辑决定何时关闭"""
+        if context:
+            with suppress(Exception):
                 await context.close()
-        except: pass
-        try:
-            if browser:
-                await browser.close()
-        except: pass
-        try:
-            if playwright:
+        if browser:
+            await self._release_browser_context(browser)
+        if playwright:
+            with suppress(Exception):
                 await playwright.stop()
-        except: pass
 
     async def _wait_and_close_after_request(
         self,
@@ -635,7 +1109,8 @@ class TokenBrowser:
         """等待上游请求结束后再关闭浏览器（超时兜底）。"""
         close_reason = "上游请求完成"
         try:
-            await asyncio.wait_for(release_event.wait(), timeout=wait_timeout)
+            async with asyncio.timeout(wait_timeout):
+                await release_event.wait()
         except asyncio.TimeoutError:
             close_reason = f"等待上游请求完成超时({wait_timeout}s)"
             debug_logger.log_warning(
@@ -649,7 +1124,7 @@ class TokenBrowser:
         finally:
             await self._close_browser(playwright, browser, context)
             debug_logger.log_info(
-                f"[BrowserCaptcha] Token-{self.token_id} {close_reason}，浏览器已关闭 (action={action})"
+                f"[BrowserCaptcha] Token-{self.token_id} {close_reason}，浏览器 context 已关闭 (action={action})"
             )
             async with self._pending_release_lock:
                 current_task = asyncio.current_task()
@@ -666,8 +1141,8 @@ class TokenBrowser:
         action: str
     ):
         """打码成功后延迟关闭浏览器，等待 Flow 请求结束通知。"""
-        flow_timeout = int(getattr(config, "flow_timeout", 300) or 300)
-        upsample_timeout = int(getattr(config, "upsample_timeout", 300) or 300)
+        flow_timeout = self._flow_timeout
+        upsample_timeout = self._upsample_timeout
         if action == "IMAGE_GENERATION":
             # 图片链路可能包含放大请求，等待上限至少覆盖 flow/upsample 超时
             base_timeout = max(flow_timeout, upsample_timeout)
@@ -697,11 +1172,11 @@ class TokenBrowser:
     async def notify_generation_request_finished(self):
         """通知当前 Token 对应的上游图片/视频请求已结束。"""
         async with self._pending_release_lock:
-            release_event = self._pending_release_events.pop(0) if self._pending_release_events else None
+            release_event = self._pending_release_events.popleft() if self._pending_release_events else None
         if release_event and not release_event.is_set():
             release_event.set()
             debug_logger.log_info(
-                f"[BrowserCaptcha] Token-{self.token_id} 收到上游请求完成通知，开始关闭浏览器"
+                f"[BrowserCaptcha] Token-{self.token_id} 收到上游请求完成通知，开始关闭浏览器 context"
             )
 
     async def force_close_pending_browser(self):
@@ -720,50 +1195,47 @@ class TokenBrowser:
                 await asyncio.wait_for(release_task, timeout=5)
             except Exception:
                 pass
+
+        # 服务关闭：无论是否仍有 context 都关闭复用的浏览器进程
+        browsers = set(self._browser_contexts)
+        if self._browser is not None:
+            browsers.add(self._browser)
+        self._cancel_idle_close()
+        self._browser = None
+        self._browser_contexts.clear()
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                # 关闭失败意味着 Chromium 进程可能残留，记录下来便于排查
+                debug_logger.log_warning(
+                    f"[BrowserCaptcha] Token-{self.token_id} 关闭浏览器进程失败: {type(e).__name__}: {str(e)[:200]}"
+                )
     
     async def _execute_captcha(self, context, project_id: str, website_key: str, action: str) -> Optional[str]:
         """在给定 context 中执行打码逻辑"""
         page = None
         try:
             page = await context.new_page()
-            await page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
             
             page_url = f"https://labs.google/fx/tools/flow/project/{project_id}"
-            primary_host = "https://www.recaptcha.net" if self._browser_proxy_active else "https://www.google.com"
-            secondary_host = "https://www.google.com" if primary_host == "https://www.recaptcha.net" else "https://www.recaptcha.net"
+            primary_host, secondary_host = _RECAPTCHA_HOSTS[self._browser_proxy_active]
             debug_logger.log_info(
                 f"[BrowserCaptcha] Token-{self.token_id} 加载 enterprise.js: primary={primary_host}, secondary={secondary_host}"
             )
             
-            async def handle_route(route):
-                if route.request.url.rstrip('/') == page_url.rstrip('/'):
-                    html = f"""<html><head><script>
-                    (() => {{
-                        const urls = [
-                            '{primary_host}/recaptcha/enterprise.js?render={website_key}',
-                            '{secondary_host}/recaptcha/enterprise.js?render={website_key}'
-                        ];
-                        const loadScript = (index) => {{
-                            if (index >= urls.length) return;
-                            const script = document.createElement('script');
-                            script.src = urls[index];
-                            script.async = true;
-                            script.onerror = () => loadScript(index + 1);
-                            document.head.appendChild(script);
-                        }};
-                        loadScript(0);
-                    }})();
-                    </script></head><body></body></html>"""
-                    await route.fulfill(status=200, content_type="text/html", body=html)
-                elif any(d in route.request.url for d in ["google.com", "gstatic.com", "recaptcha.net"]):
-                    await route.continue_()
-                else:
-                    await route.abort()
+            bootstrap_html = _build_bootstrap_html(primary_host, secondary_host, website_key)
+
+            async def handle_bootstrap(route):
+                await route.fulfill(status=200, content_type="text/html", body=bootstrap_html)
+
+            async def handle_blocked(route):
+                await route.abort()
 
             def handle_request_failed(request):
                 try:
                     failed_url = request.url or ""
-                    if not any(d in failed_url for d in ["google.com", "gstatic.com", "recaptcha.net"]):
+                    if not _RECAPTCHA_DOMAINS_RE.search(failed_url):
                         return
                     failure = request.failure or ""
                     debug_logger.log_warning(
@@ -772,27 +1244,35 @@ class TokenBrowser:
                 except Exception:
                     pass
             
-            await page.route("**/*", handle_route)
+            # 拦截模式下发给浏览器端匹配：google/gstatic/recaptcha 资源不命中任何路由，直接放行不回调 Python；
+            # 其余请求中止；项目页返回引导 HTML（后注册的路由优先匹配）
+            await page.route(_NON_RECAPTCHA_URL_RE, handle_blocked)
+            await page.route(re.compile("^" + re.escape(page_url.rstrip('/')) + "/*$"), handle_bootstrap)
             page.on("requestfailed", handle_request_failed)
+            network_tracker = _NetworkQuietTracker(page)
             reload_ok_event = asyncio.Event()
             clr_ok_event = asyncio.Event()
 
             def handle_response(response):
                 try:
-                    if response.status != 200:
+                    # 先用子串快速过滤，绝大多数子资源响应不会进入正则匹配
+                    url = response.url
+                    if "recaptcha/enterprise/" not in url or response.status != 200:
                         return
-                    parsed = urlparse(response.url)
-                    path = parsed.path or ""
-                    if "recaptcha/enterprise/reload" not in path and "recaptcha/enterprise/clr" not in path:
+                    path = url.split("?", 1)[0]
+                    is_reload = "recaptcha/enterprise/reload" in path
+                    if not is_reload and "recaptcha/enterprise/clr" not in path:
                         return
-                    query = parse_qs(parsed.query or "")
-                    key = (query.get("k") or [None])[0]
-                    if key != website_key:
+                    match = _K_PARAM_RE.search(url)
+                    if not match or unquote(match.group(1)) != website_key:
                         return
-                    if "recaptcha/enterprise/reload" in path:
+                    if is_reload:
                         reload_ok_event.set()
-                    elif "recaptcha/enterprise/clr" in path:
+                    else:
                         clr_ok_event.set()
+                    if reload_ok_event.is_set() and clr_ok_event.is_set():
+                        # 两个信号都已拿到，取消订阅，后续响应不再回调到 Python
+                        page.remove_listener("response", handle_response)
                 except Exception:
                     pass
 
@@ -809,47 +1289,47 @@ class TokenBrowser:
                 debug_logger.log_warning(f"[BrowserCaptcha] Token-{self.token_id} grecaptcha 未就绪: {type(e).__name__}: {str(e)[:200]}")
                 return None
 
-            # 记录本次打码页面的真实 UA/客户端提示头
-            await self._capture_page_fingerprint(page)
-            
-            token = await asyncio.wait_for(
-                page.evaluate(f"""
+            # token 与本次打码页面的真实 UA/客户端提示头在同一次 evaluate 中取回
+            async with asyncio.timeout(30):
+                result = await page.evaluate(f"""
                     (actionName) => {{
+                        const fingerprint = window.__flow_fp ? window.__flow_fp() : null;
                         return new Promise((resolve, reject) => {{
                             const timeout = setTimeout(() => reject(new Error('timeout')), 25000);
                             grecaptcha.enterprise.execute('{website_key}', {{action: actionName}})
-                                .then(t => {{ resolve(t); }})
+                                .then(t => {{ resolve({{token: t, fingerprint}}); }})
                                 .catch(e => {{ reject(e); }});
                         }});
                     }}
-                """, action),
-                timeout=30
+                """, action)
+            token = result.get("token") if isinstance(result, dict) else None
+            if not self._merge_fingerprint(result.get("fingerprint") if isinstance(result, dict) else None):
+                await self._capture_page_fingerprint(page)
+
+            # 按要求：等待 enterprise/reload 与 enterprise/clr 均出现并返回 200（两者并发等待）
+            _, pending = await asyncio.wait(
+                [asyncio.create_task(reload_ok_event.wait()), asyncio.create_task(clr_ok_event.wait())],
+                timeout=12,
             )
-
-            # 按要求：等待 enterprise/reload 与 enterprise/clr 均出现并返回 200
-            try:
-                await asyncio.wait_for(reload_ok_event.wait(), timeout=12)
-            except asyncio.TimeoutError:
-                debug_logger.log_warning(
-                    f"[BrowserCaptcha] Token-{self.token_id} 等待 recaptcha enterprise/reload 200 超时"
-                )
-                return None
-
-            try:
-                await asyncio.wait_for(clr_ok_event.wait(), timeout=12)
-            except asyncio.TimeoutError:
+            if pending:
+                for task in pending:
+                    task.cancel()
+                missing = [
+                    name for name, event in (("reload", reload_ok_event), ("clr", clr_ok_event))
+                    if not event.is_set()
+                ]
                 debug_logger.log_warning(
-                    f"[BrowserCaptcha] Token-{self.token_id} 等待 recaptcha enterprise/clr 200 超时"
+                    f"[BrowserCaptcha] Token-{self.token_id} 等待 recaptcha enterprise/{'+'.join(missing)} 200 超时"
                 )
                 return None
 
-            # 即使 reload/clr 都已返回 200，也额外等待几秒，确保 enterprise 请求链路完全稳定。
-            post_wait_seconds = float(getattr(config, "browser_recaptcha_settle_seconds", 3) or 3)
+            # 即使 reload/clr 都已返回 200，也等待 enterprise 请求链路静默（最多 settle 秒）后再返回。
+            post_wait_seconds = self._recaptcha_settle
             if post_wait_seconds > 0:
+                waited = await network_tracker.wait(post_wait_seconds)
                 debug_logger.log_info(
-                    f"[BrowserCaptcha] Token-{self.token_id} reload/clr 已就绪，额外等待 {post_wait_seconds:.1f}s 后返回 token"
+                    f"[BrowserCaptcha] Token-{self.token_id} reload/clr 已就绪，等待网络静默 {waited:.1f}s (上限 {post_wait_seconds:.1f}s) 后返回 token"
                 )
-                await asyncio.sleep(post_wait_seconds)
 
             return token
         except Exception as e:
@@ -876,20 +1356,11 @@ class TokenBrowser:
         page = None
         try:
             page = await context.new_page()
-            await page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined});")
-
-            primary_host = "https://www.recaptcha.net" if self._browser_proxy_active else "https://www.google.com"
-            secondary_host = "https://www.google.com" if primary_host == "https://www.recaptcha.net" else "https://www.recaptcha.net"
-            script_path = "recaptcha/enterprise.js" if enterprise else "recaptcha/api.js"
-            execute_target = "grecaptcha.enterprise.execute" if enterprise else "grecaptcha.execute"
-            ready_target = "grecaptcha.enterprise.ready" if enterprise else "grecaptcha.ready"
-            wait_expression = (
-                "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && "
-                "typeof grecaptcha.enterprise.execute === 'function'"
-            ) if enterprise else (
-                "typeof grecaptcha !== 'undefined' && typeof grecaptcha.execute === 'function'"
+
+            primary_host, secondary_host = _RECAPTCHA_HOSTS[self._browser_proxy_active]
+            script_path, execute_target, ready_target, wait_expression, api_label = (
+                _RECAPTCHA_ENTERPRISE_API if enterprise else _RECAPTCHA_V3_API
             )
-            api_label = "enterprise.js" if enterprise else "api.js"
 
             debug_logger.log_info(
                 f"[BrowserCaptcha] Token-{self.token_id} 加载真实自定义页面 {api_label}: primary={primary_host}, secondary={secondary_host}, url={website_url}"
@@ -898,7 +1369,7 @@ class TokenBrowser:
             def handle_request_failed(request):
                 try:
                     failed_url = request.url or ""
-                    if not any(d in failed_url for d in ["google.com", "gstatic.com", "recaptcha.net", "antcpt.com"]):
+                    if not _RECAPTCHA_DOMAINS_RE_CUSTOM.search(failed_url):
                         return
                     failure = request.failure or ""
                     debug_logger.log_warning(
@@ -908,6 +1379,7 @@ class TokenBrowser:
                     pass
 
             page.on("requestfailed", handle_request_failed)
+            network_tracker = _NetworkQuietTracker(page)
 
             try:
                 await page.goto(website_url, wait_until="domcontentloaded", timeout=30000)
@@ -917,43 +1389,29 @@ class TokenBrowser:
                 )
                 return None
 
-            page_loaded = False
-            for _ in range(20):
-                try:
-                    ready_state = await page.evaluate("document.readyState")
-                    if ready_state == "complete":
-                        page_loaded = True
-                        break
-                except Exception:
-                    pass
-                await asyncio.sleep(0.5)
+            # load 事件即 readyState == complete，直接等待事件而不是轮询
+            try:
+                await page.wait_for_load_state("load", timeout=10000)
+                page_loaded = True
+            except Exception:
+                page_loaded = False
             if not page_loaded:
                 debug_logger.log_warning(f"[BrowserCaptcha] Token-{self.token_id} 自定义页面 readyState 未达到 complete，继续尝试预热")
 
             # 模拟更自然的前台交互，避免冷启动空白上下文直接 execute。
+            # 鼠标/滚轮保留 CDP 真实输入（isTrusted），页面内合成事件无法替代。
+            fingerprint_captured = False
             try:
                 await page.mouse.move(320, 220)
                 await page.mouse.move(520, 320, steps=12)
                 await page.mouse.wheel(0, 240)
                 await page.bring_to_front()
-                await page.evaluate("""
-                    (() => {
-                        try {
-                            window.focus();
-                            window.dispatchEvent(new Event('focus'));
-                            document.dispatchEvent(new MouseEvent('mousemove', {
-                                bubbles: true,
-                                clientX: Math.max(32, Math.floor((window.innerWidth || 1280) * 0.4)),
-                                clientY: Math.max(32, Math.floor((window.innerHeight || 720) * 0.35))
-                            }));
-                            window.scrollTo(0, Math.min(280, document.body?.scrollHeight || 280));
-                        } catch (e) {}
-                    })()
-                """)
+                # 焦点/滚动事件与指纹提取合并为一次 evaluate
+                fingerprint_captured = self._merge_fingerprint(await page.evaluate(_WARMUP_AND_FINGERPRINT_JS))
             except Exception:
                 pass
 
-            warmup_seconds = float(getattr(config, "browser_score_test_warmup_seconds", 12) or 12)
+            warmup_seconds = self._score_test_warmup
             if warmup_seconds > 0:
                 debug_logger.log_info(
                     f"[BrowserCaptcha] Token-{self.token_id} 真实页面预热 {warmup_seconds:.1f}s 后再执行自定义打码"
@@ -967,25 +1425,10 @@ class TokenBrowser:
                     f"[BrowserCaptcha] Token-{self.token_id} 自定义 grecaptcha 未就绪，尝试补注入脚本: {type(e).__name__}: {str(e)[:200]}"
                 )
                 try:
-                    await page.evaluate(f"""
-                        (primaryUrl, secondaryUrl) => {{
-                            const existing = Array.from(document.scripts || []).some((script) => {{
-                                const src = script?.src || "";
-                                return src.includes('/recaptcha/');
-                            }});
-                            if (existing) return;
-                            const urls = [primaryUrl, secondaryUrl];
-                            const loadScript = (index) => {{
-                                if (index >= urls.length) return;
-                                const script = document.createElement('script');
-                                script.src = urls[index];
-                                script.async = true;
-                                script.onerror = () => loadScript(index + 1);
-                                document.head.appendChild(script);
-                            }};
-                            loadScript(0);
-                        }}
-                    """, f"{primary_host}/{script_path}?render={website_key}", f"{secondary_host}/{script_path}?render={website_key}")
+                    await page.evaluate(
+                        _INJECT_RECAPTCHA_JS,
+                        [f"{primary_host}/{script_path}?render={website_key}", f"{secondary_host}/{script_path}?render={website_key}"],
+                    )
                     await page.wait_for_function(wait_expression, timeout=15000)
                 except Exception as inject_error:
                     debug_logger.log_warning(
@@ -993,10 +1436,12 @@ class TokenBrowser:
                     )
                     return None
 
-            await self._capture_page_fingerprint(page)
+            if not verify_url and not fingerprint_captured:
+                # 需要读分数时由 _verify_score_in_page 一并取回指纹
+                await self._capture_page_fingerprint(page)
 
-            token = await asyncio.wait_for(
-                page.evaluate(
+            async with asyncio.timeout(30):
+                token = await page.evaluate(
                     f"""
                         (actionName) => {{
                             return new Promise((resolve, reject) => {{
@@ -1021,19 +1466,17 @@ class TokenBrowser:
                         }}
                     """,
                     action,
-                ),
-                timeout=30,
-            )
+                )
 
-            post_wait_seconds = float(getattr(config, "browser_recaptcha_settle_seconds", 3) or 3)
+            post_wait_seconds = self._recaptcha_settle
             if post_wait_seconds > 0:
+                waited = await network_tracker.wait(post_wait_seconds)
                 debug_logger.log_info(
-                    f"[BrowserCaptcha] Token-{self.token_id} 自定义打码已完成，额外等待 {post_wait_seconds:.1f}s 后返回 token"
+                    f"[BrowserCaptcha] Token-{self.token_id} 自定义打码已完成，等待网络静默 {waited:.1f}s (上限 {post_wait_seconds:.1f}s) 后返回 token"
                 )
-                await asyncio.sleep(post_wait_seconds)
 
             if verify_url:
-                verify_payload = await self._verify_score_in_page(page, token, verify_url)
+                verify_payload = await self._verify_score_in_page(page)
                 return {
                     "token": token,
                     **verify_payload,
@@ -1057,66 +1500,28 @@ class TokenBrowser:
             return None
         return dict(self._last_fingerprint)
     
-    async def get_token(self, project_id: str, website_key: str, action: str = "IMAGE_GENERATION") -> Optional[str]:
-        """获取 Token：启动新浏览器 -> 打码 -> 关闭浏览器"""
-        async with self._semaphore:
-            MAX_RETRIES = 3
-            
-            for attempt in range(MAX_RETRIES):
-                playwright = None
-                browser = None
-                context = None
-                try:
-                    start_ts = time.time()
-                    
-                    # 每次都启动新浏览器（新 UA）
-                    playwright, browser, context = await self._create_browser()
-                    
-                    # 执行打码
-                    token = await self._execute_captcha(context, project_id, website_key, action)
-                    
-                    if token:
-                        self._solve_count += 1
-                        debug_logger.log_info(f"[BrowserCaptcha] Token-{self.token_id} 获取成功 ({(time.time()-start_ts)*1000:.0f}ms)")
-                        # 不立即关闭浏览器：等待图片/视频请求结束后再关闭
-                        await self._defer_browser_close_until_request_done(
-                            playwright=playwright,
-                            browser=browser,
-                            context=context,
-                            action=action,
-                        )
-                        playwright = None
-                        browser = None
-                        context = None
-                        return token
-                    
-                    self._error_count += 1
-                    debug_logger.log_warning(f"[BrowserCaptcha] Token-{self.token_id} 尝试 {attempt+1}/{MAX_RETRIES} 失败")
-                    
-                except Exception as e:
-                    self._error_count += 1
-                    debug_logger.log_error(f"[BrowserCaptcha] Token-{self.token_id} 浏览器错误: {type(e).__name__}: {str(e)[:200]}")
-                finally:
-                    # 无论成功失败都关闭浏览器
-                    await self._close_browser(playwright, browser, context)
-                
-                # 重试前等待
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(1)
-            
-            return None
-
-    async def get_custom_token(
+    async def _run_with_retry(
         self,
-        website_url: str,
-        website_key: str,
-        action: str = "homepage",
-        enterprise: bool = False,
-    ) -> Optional[str]:
-        """获取任意站点的 reCAPTCHA token，成功后立即关闭浏览器。"""
-        async with self._semaphore:
-            max_retries = 3
+        solve,
+        *,
+        label: str,
+        is_success=bool,
+        defer_close_action: Optional[str] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 0.25,
+    ) -> tuple:
+        """统一的打码重试循环：每次尝试新建 context 执行 solve(context)，成功即返回
 
+        Args:
+            solve: 接收 context、返回打码结果的协程函数
+            label: 日志前缀
+            is_success: 判断结果是否成功
+            defer_close_action: 非空时成功后不立即关闭 context，等待上游请求完成（见 _defer_browser_close_until_request_done）
+
+        Returns:
+            (result, elapsed_ms)，全部失败时 result 为 None
+        """
+        async with self._semaphore:
             for attempt in range(max_retries):
                 playwright = None
                 browser = None
@@ -1124,37 +1529,70 @@ class TokenBrowser:
                 try:
                     start_ts = time.time()
                     playwright, browser, context = await self._create_browser()
-                    token = await self._execute_custom_captcha(
-                        context=context,
-                        website_url=website_url,
-                        website_key=website_key,
-                        action=action,
-                        enterprise=enterprise,
-                    )
+                    result = await solve(context)
 
-                    if token:
+                    if is_success(result):
+                        elapsed_ms = int((time.time() - start_ts) * 1000)
                         self._solve_count += 1
-                        debug_logger.log_info(
-                            f"[BrowserCaptcha] Token-{self.token_id} 自定义 token 获取成功 ({(time.time()-start_ts)*1000:.0f}ms)"
-                        )
-                        return token
+                        debug_logger.log_info(f"[BrowserCaptcha] Token-{self.token_id} {label}成功 ({elapsed_ms}ms)")
+                        if defer_close_action:
+                            # 不立即关闭：等待图片/视频请求结束后再关闭
+                            await self._defer_browser_close_until_request_done(
+                                playwright=playwright,
+                                browser=browser,
+                                context=context,
+                                action=defer_close_action,
+                            )
+                            playwright = None
+                            browser = None
+                            context = None
+                        return result, elapsed_ms
 
                     self._error_count += 1
-                    debug_logger.log_warning(
-                        f"[BrowserCaptcha] Token-{self.token_id} 自定义打码尝试 {attempt+1}/{max_retries} 失败"
-                    )
+                    debug_logger.log_warning(f"[BrowserCaptcha] Token-{self.token_id} {label}尝试 {attempt+1}/{max_retries} 失败")
                 except Exception as e:
                     self._error_count += 1
                     debug_logger.log_error(
-                        f"[BrowserCaptcha] Token-{self.token_id} 自定义浏览器错误: {type(e).__name__}: {str(e)[:200]}"
+                        f"[BrowserCaptcha] Token-{self.token_id} {label}异常: {type(e).__name__}: {str(e)[:200]}"
                     )
                 finally:
+                    # 无论成功失败都关闭本次的 context（延迟关闭时已置空）
                     await self._close_browser(playwright, browser, context)
 
+                # 重试前等待：指数退避 + 少量抖动，封顶 1s
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(1)
+                    await asyncio.sleep(min(retry_backoff * (2 ** attempt), 1.0) + random.random() * 0.1)
 
-            return None
+            return None, 0
+
+    async def get_token(self, project_id: str, website_key: str, action: str = "IMAGE_GENERATION") -> Optional[str]:
+        """获取 Token：复用浏览器进程新建 context -> 打码 -> 关闭 context"""
+        token, _ = await self._run_with_retry(
+            lambda context: self._execute_captcha(context, project_id, website_key, action),
+            label="打码",
+            defer_close_action=action,
+        )
+        return token
+
+    async def get_custom_token(
+        self,
+        website_url: str,
+        website_key: str,
+        action: str = "homepage",
+        enterprise: bool = False,
+    ) -> Optional[str]:
+        """获取任意站点的 reCAPTCHA token，成功后立即关闭 context。"""
+        token, _ = await self._run_with_retry(
+            lambda context: self._execute_custom_captcha(
+                context=context,
+                website_url=website_url,
+                website_key=website_key,
+                action=action,
+                enterprise=enterprise,
+            ),
+            label="自定义打码",
+        )
+        return token
 
     async def get_custom_score(
         self,
@@ -1165,55 +1603,29 @@ class TokenBrowser:
         enterprise: bool = False,
     ) -> Dict[str, Any]:
         """在同一个浏览器页面里获取 token 并直接校验分数。"""
-        async with self._semaphore:
-            max_retries = 3
-
-            for attempt in range(max_retries):
-                playwright = None
-                browser = None
-                context = None
-                try:
-                    started_at = time.time()
-                    playwright, browser, context = await self._create_browser()
-                    payload = await self._execute_custom_captcha(
-                        context=context,
-                        website_url=website_url,
-                        website_key=website_key,
-                        action=action,
-                        verify_url=verify_url,
-                        enterprise=enterprise,
-                    )
-
-                    if isinstance(payload, dict) and payload.get("token"):
-                        self._solve_count += 1
-                        payload.setdefault("token_elapsed_ms", int((time.time() - started_at) * 1000))
-                        debug_logger.log_info(
-                            f"[BrowserCaptcha] Token-{self.token_id} 页面内分数校验成功 ({(time.time()-started_at)*1000:.0f}ms)"
-                        )
-                        return payload
-
-                    self._error_count += 1
-                    debug_logger.log_warning(
-                        f"[BrowserCaptcha] Token-{self.token_id} 页面内分数校验尝试 {attempt+1}/{max_retries} 失败"
-                    )
-                except Exception as e:
-                    self._error_count += 1
-                    debug_logger.log_error(
-                        f"[BrowserCaptcha] Token-{self.token_id} 页面内分数校验异常: {type(e).__name__}: {str(e)[:200]}"
-                    )
-                finally:
-                    await self._close_browser(playwright, browser, context)
+        payload, elapsed_ms = await self._run_with_retry(
+            lambda context: self._execute_custom_captcha(
+                context=context,
+                website_url=website_url,
+                website_key=website_key,
+                action=action,
+                verify_url=verify_url,
+                enterprise=enterprise,
+            ),
+            label="页面内分数校验",
+            is_success=lambda payload: isinstance(payload, dict) and bool(payload.get("token")),
+        )
+        if payload:
+            payload.setdefault("token_elapsed_ms", elapsed_ms)
+            return payload
 
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(1)
-
-            return {
-                "token": None,
-                "verify_mode": "browser_page",
-                "verify_elapsed_ms": 0,
-                "verify_http_status": None,
-                "verify_result": {}
-            }
+        return {
+            "token": None,
+            "verify_mode": "browser_page",
+            "verify_elapsed_ms": 0,
+            "verify_http_status": None,
+            "verify_result": {}
+        }
     
 
 class BrowserCaptchaService:
@@ -1223,6 +1635,7 @@ class BrowserCaptchaService:
     """
     
     _instance: Optional['BrowserCaptchaService'] = None
+    # Python 3.10+ 的 asyncio.Lock 在首次等待时才绑定事件循环，导入时创建是安全的（与模块级锁一致）
     _lock = asyncio.Lock()
     
     def __init__(self, db=None):
@@ -1234,24 +1647,36 @@ class BrowserCaptchaService:
         
         # 浏览器数量配置
         self._browser_count = 1  # 默认 1 个，会从数据库加载
-        self._round_robin_index = 0  # 轮询索引
+        self._round_robin = itertools.count()  # 轮询计数器
         
-        # 统计指标
-        self._stats = {
-            "req_total": 0,
-            "gen_ok": 0,
-            "gen_fail": 0,
-            "api_403": 0
+        # 统计指标（普通整数属性，读写均为属性访问，不经过 dict 查找）
+        self._req_total = 0
+        self._gen_ok = 0
+        self._gen_fail = 0
+        self._api_403 = 0
+        # get_stats 返回结构的骨架；browsers 固定为空，用不可变元组以免浅拷贝后被调用方共享修改
+        self._stats_template: Dict[str, Any] = {
+            "total_solve_count": 0,
+            "total_error_count": 0,
+            "risk_403_count": 0,
+            "browser_count": 0,
+            "configured_browser_count": 0,
+            "browsers": (),
         }
         
         # 并发限制将在 _load_browser_count 中根据配置设置
         self._token_semaphore = None
+        # close() 只执行一次；关闭后迟到的请求完成通知直接忽略
+        self._closed = False
     
     @classmethod
     async def get_instance(cls, db=None) -> 'BrowserCaptchaService':
         if cls._instance is None:
             async with cls._lock:
                 if cls._instance is None:
+                    # 与导入时的旧逻辑一致：仅 playwright 引擎需要确认 chromium 已安装
+                    if BROWSER_ENGINE == "playwright" and not IS_DOCKER:
+                        await _ensure_browser_installed_once()
                     cls._instance = cls(db)
                     # 从数据库加载 browser_count 配置
                     await cls._instance._load_browser_count()
@@ -1289,6 +1714,10 @@ class BrowserCaptchaService:
         old_count = self._browser_count
         await self._load_browser_count()
         
+        async with self._browsers_lock:
+            for browser in self._browsers.values():
+                browser.refresh_config()
+
         # 如果数量减少，移除多余的浏览器实例
         if self._browser_count < old_count:
             async with self._browsers_lock:
@@ -1298,10 +1727,10 @@ class BrowserCaptchaService:
                         debug_logger.log_info(f"[BrowserCaptcha] 移除多余浏览器实例 {browser_id}")
     
     def _log_stats(self):
-        total = self._stats["req_total"]
-        gen_fail = self._stats["gen_fail"]
-        api_403 = self._stats["api_403"]
-        gen_ok = self._stats["gen_ok"]
+        total = self._req_total
+        gen_fail = self._gen_fail
+        api_403 = self._api_403
+        gen_ok = self._gen_ok
         
         valid_success = gen_ok - api_403
         if valid_success < 0: valid_success = 0
@@ -1311,6 +1740,10 @@ class BrowserCaptchaService:
     
     async def _get_or_create_browser(self, browser_id: int) -> TokenBrowser:
         """获取或创建指定 ID 的浏览器实例"""
+        # 常见路径：实例已存在，直接读取无需加锁（事件循环单线程，dict 读取是原子的）
+        browser = self._browsers.get(browser_id)
+        if browser is not None:
+            return browser
         async with self._browsers_lock:
             if browser_id not in self._browsers:
                 user_data_dir = os.path.join(self.base_user_data_dir, f"browser_{browser_id}")
@@ -1319,11 +1752,13 @@ class BrowserCaptchaService:
                 debug_logger.log_info(f"[BrowserCaptcha] 创建浏览器实例 {browser_id}")
             return self._browsers[browser_id]
     
+    def _get_browser_snapshot(self, browser_id: int) -> Optional[TokenBrowser]:
+        """读取浏览器实例引用（_browsers 的增删均为单条 dict 操作，事件循环内是原子的，无需加锁）"""
+        return self._browsers.get(browser_id)
+
     def _get_next_browser_id(self) -> int:
         """轮询获取下一个浏览器 ID"""
-        browser_id = self._round_robin_index % self._browser_count
-        self._round_robin_index += 1
-        return browser_id
+        return next(self._round_robin) % self._browser_count
     
     async def get_token(self, project_id: str, action: str = "IMAGE_GENERATION", token_id: int = None) -> tuple[Optional[str], int]:
         """获取 reCAPTCHA Token（轮询分配到不同浏览器）
@@ -1339,38 +1774,32 @@ class BrowserCaptchaService:
         # 检查服务是否可用
         self._check_available()
         
-        self._stats["req_total"] += 1
-        
-        # 全局并发限制（如果已配置）
+        self._req_total += 1
+
+        token, browser_id = await self._run_on_next_browser(
+            lambda browser: browser.get_token(project_id, self.website_key, action)
+        )
+
+        if token:
+            self._gen_ok += 1
+        else:
+            self._gen_fail += 1
+            
+        self._log_stats()
+        return token, browser_id
+
+    async def _run_on_next_browser(self, call) -> tuple:
+        """按轮询选择浏览器执行 call(browser)，受全局并发限制（如果已配置），返回 (结果, browser_id)"""
         if self._token_semaphore:
             async with self._token_semaphore:
-                # 轮询选择浏览器
                 browser_id = self._get_next_browser_id()
                 browser = await self._get_or_create_browser(browser_id)
-                
-                token = await browser.get_token(project_id, self.website_key, action)
-            
-            if token:
-                self._stats["gen_ok"] += 1
-            else:
-                self._stats["gen_fail"] += 1
-                
-            self._log_stats()
-            return token, browser_id
-        
+                return await call(browser), browser_id
+
         # 无并发限制时直接执行
         browser_id = self._get_next_browser_id()
         browser = await self._get_or_create_browser(browser_id)
-        
-        token = await browser.get_token(project_id, self.website_key, action)
-        
-        if token:
-            self._stats["gen_ok"] += 1
-        else:
-            self._stats["gen_fail"] += 1
-            
-        self._log_stats()
-        return token, browser_id
+        return await call(browser), browser_id
 
     async def get_custom_token(
         self,
@@ -1381,28 +1810,14 @@ class BrowserCaptchaService:
     ) -> tuple[Optional[str], int]:
         """获取任意站点的 reCAPTCHA token，用于分数测试。"""
         self._check_available()
-
-        if self._token_semaphore:
-            async with self._token_semaphore:
-                browser_id = self._get_next_browser_id()
-                browser = await self._get_or_create_browser(browser_id)
-                token = await browser.get_custom_token(
-                    website_url=website_url,
-                    website_key=website_key,
-                    action=action,
-                    enterprise=enterprise,
-                )
-            return token, browser_id
-
-        browser_id = self._get_next_browser_id()
-        browser = await self._get_or_create_browser(browser_id)
-        token = await browser.get_custom_token(
-            website_url=website_url,
-            website_key=website_key,
-            action=action,
-            enterprise=enterprise,
+        return await self._run_on_next_browser(
+            lambda browser: browser.get_custom_token(
+                website_url=website_url,
+                website_key=website_key,
+                action=action,
+                enterprise=enterprise,
+            )
         )
-        return token, browser_id
 
     async def get_custom_score(
         self,
@@ -1414,38 +1829,22 @@ class BrowserCaptchaService:
     ) -> tuple[Dict[str, Any], int]:
         """在浏览器页面内完成 token 获取与分数校验。"""
         self._check_available()
-
-        if self._token_semaphore:
-            async with self._token_semaphore:
-                browser_id = self._get_next_browser_id()
-                browser = await self._get_or_create_browser(browser_id)
-                payload = await browser.get_custom_score(
-                    website_url=website_url,
-                    website_key=website_key,
-                    verify_url=verify_url,
-                    action=action,
-                    enterprise=enterprise,
-                )
-            return payload, browser_id
-
-        browser_id = self._get_next_browser_id()
-        browser = await self._get_or_create_browser(browser_id)
-        payload = await browser.get_custom_score(
-            website_url=website_url,
-            website_key=website_key,
-            verify_url=verify_url,
-            action=action,
-            enterprise=enterprise,
+        return await self._run_on_next_browser(
+            lambda browser: browser.get_custom_score(
+                website_url=website_url,
+                website_key=website_key,
+                verify_url=verify_url,
+                action=action,
+                enterprise=enterprise,
+            )
         )
-        return payload, browser_id
 
     async def get_fingerprint(self, browser_id: int) -> Optional[Dict[str, Any]]:
         """获取指定浏览器最近一次打码时的指纹快照。"""
-        async with self._browsers_lock:
-            browser = self._browsers.get(browser_id)
-            if not browser:
-                return None
-            return browser.get_last_fingerprint()
+        browser = self._get_browser_snapshot(browser_id)
+        if not browser:
+            return None
+        return browser.get_last_fingerprint()
 
     async def report_error(self, browser_id: int = None):
         """上层举报：Token 无效（统计用）
@@ -1454,47 +1853,76 @@ class BrowserCaptchaService:
             browser_id: 浏览器 ID（当前架构下每次都是新浏览器，此参数仅用于日志）
         """
         async with self._browsers_lock:
-            self._stats["api_403"] += 1
+            self._api_403 += 1
             if browser_id is not None:
                 debug_logger.log_info(f"[BrowserCaptcha] 浏览器 {browser_id} 的 token 验证失败")
 
     async def report_request_finished(self, browser_id: int = None):
         """上层通知：图片/视频请求已完成，可关闭对应打码浏览器。"""
-        if browser_id is None:
+        if browser_id is None or self._closed:
             return
 
-        async with self._browsers_lock:
-            browser = self._browsers.get(browser_id)
-
+        # 只在取引用时访问 _browsers，await 必须放在任何锁之外，否则所有请求的完成通知会被串行化
+        browser = self._get_browser_snapshot(browser_id)
         if browser:
             await browser.notify_generation_request_finished()
 
-    async def remove_browser(self, browser_id: int):
-        async with self._browsers_lock:
-            if browser_id in self._browsers:
-                self._browsers.pop(browser_id)
+    def remove_browser(self, browser_id: int):
+        if self._closed:
+            return
+        self._browsers.pop(browser_id, None)
 
     async def close(self):
+        # 在第一个 await 之前置位，并发或重复调用（信号处理 + __aexit__）直接返回
+        if self._closed:
+            return
+        self._closed = True
+
+        # 整体换出字典，关闭期间新建的实例进入新字典，不会与正在关闭的实例混在一起
         async with self._browsers_lock:
-            browsers = list(self._browsers.values())
-            self._browsers.clear()
+            old_browsers, self._browsers = self._browsers, {}
+        browsers = old_browsers.values()
 
-        for browser in browsers:
+        async def close_one(browser: TokenBrowser):
             try:
-                await browser.force_close_pending_browser()
-            except Exception:
-                pass
+                await asyncio.wait_for(browser.force_close_pending_browser(), timeout=_BROWSER_CLOSE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                debug_logger.log_warning(
+                    f"[BrowserCaptcha] 关闭浏览器 {browser.token_id} 超过 {_BROWSER_CLOSE_TIMEOUT_SECONDS:.0f}s，放弃等待"
+                )
+            except Exception as e:
+                debug_logger.log_warning(
+                    f"[BrowserCaptcha] 关闭浏览器 {browser.token_id} 失败: {type(e).__name__}: {str(e)[:200]}"
+                )
+
+        # 各浏览器的关闭互不依赖，并发执行；单个卡死或失败不影响其余关闭
+        await asyncio.gather(*(close_one(browser) for browser in browsers))
+
+        await _stop_playwright()
+
+    async def __aenter__(self) -> 'BrowserCaptchaService':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __del__(self):
+        # 未调用 close() 就被回收时提示，便于在测试中用 -W error::ResourceWarning 发现泄漏
+        if getattr(self, "_browsers", None):
+            warnings.warn(
+                f"BrowserCaptchaService 被回收时仍有 {len(self._browsers)} 个浏览器实例未关闭",
+                ResourceWarning,
+            )
             
     async def open_login_browser(self): return {"success": False, "error": "Not implemented"}
     async def create_browser_for_token(self, t, s=None): pass
     def get_stats(self): 
-        base_stats = {
-            "total_solve_count": self._stats["gen_ok"],
-            "total_error_count": self._stats["gen_fail"],
-            "risk_403_count": self._stats["api_403"],
-            "browser_count": len(self._browsers),
-            "configured_browser_count": self._browser_count,
-            "browsers": []
-        }
-        return base_stats
+        # 复用同一份骨架只更新数值字段，返回浅拷贝避免调用方改动内部状态
+        base_stats = self._stats_template
+        base_stats["total_solve_count"] = self._gen_ok
+        base_stats["total_error_count"] = self._gen_fail
+        base_stats["risk_403_count"] = self._api_403
+        base_stats["browser_count"] = len(self._browsers)
+        base_stats["configured_browser_count"] = self._browser_count
+        return base_stats.copy()
 
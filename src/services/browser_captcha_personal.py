@@ -4,11 +4,11 @@
 支持常驻模式：为每个 project_id 自动创建常驻标签页，即时生成 token
 """
 import asyncio
+import random
 import time
 import os
-import sys
-import subprocess
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 
 from ..core.logger import debug_logger
 from ..core.config import config
@@ -40,84 +40,266 @@ def _is_running_in_docker() -> bool:
 IS_DOCKER = _is_running_in_docker()
 
 
-# ==================== nodriver 自动安装 ====================
-def _run_pip_install(package: str, use_mirror: bool = False) -> bool:
-    """运行 pip install 命令
-    
-    Args:
-        package: 包名
-        use_mirror: 是否使用国内镜像
-    
-    Returns:
-        是否安装成功
-    """
-    cmd = [sys.executable, '-m', 'pip', 'install', package]
-    if use_mirror:
-        cmd.extend(['-i', 'https://pypi.tuna.tsinghua.edu.cn/simple'])
-    
-    try:
-        debug_logger.log_info(f"[BrowserCaptcha] 正在安装 {package}...")
-        print(f"[BrowserCaptcha] 正在安装 {package}...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        if result.returncode == 0:
-            debug_logger.log_info(f"[BrowserCaptcha] ✅ {package} 安装成功")
-            print(f"[BrowserCaptcha] ✅ {package} 安装成功")
-            return True
-        else:
-            debug_logger.log_warning(f"[BrowserCaptcha] {package} 安装失败: {result.stderr[:200]}")
-            return False
-    except Exception as e:
-        debug_logger.log_warning(f"[BrowserCaptcha] {package} 安装异常: {e}")
-        return False
-
-
-def _ensure_nodriver_installed() -> bool:
-    """确保 nodriver 已安装
-    
-    Returns:
-        是否安装成功/已安装
-    """
-    try:
-        import nodriver
-        debug_logger.log_info("[BrowserCaptcha] nodriver 已安装")
-        return True
-    except ImportError:
-        pass
-    
-    debug_logger.log_info("[BrowserCaptcha] nodriver 未安装，开始自动安装...")
-    print("[BrowserCaptcha] nodriver 未安装，开始自动安装...")
-    
-    # 先尝试官方源
-    if _run_pip_install('nodriver', use_mirror=False):
-        return True
-    
-    # 官方源失败，尝试国内镜像
-    debug_logger.log_info("[BrowserCaptcha] 官方源安装失败，尝试国内镜像...")
-    print("[BrowserCaptcha] 官方源安装失败，尝试国内镜像...")
-    if _run_pip_install('nodriver', use_mirror=True):
-        return True
-    
-    debug_logger.log_error("[BrowserCaptcha] ❌ nodriver 自动安装失败，请手动安装: pip install nodriver")
-    print("[BrowserCaptcha] ❌ nodriver 自动安装失败，请手动安装: pip install nodriver")
-    return False
-
-
 # 尝试导入 nodriver
 uc = None
 NODRIVER_AVAILABLE = False
+# _check_available 首次通过后置位
+_AVAILABILITY_CHECKED = False
 
 if IS_DOCKER:
     debug_logger.log_warning("[BrowserCaptcha] 检测到 Docker 环境，内置浏览器打码不可用，请使用第三方打码服务")
     print("[BrowserCaptcha] ⚠️ 检测到 Docker 环境，内置浏览器打码不可用")
     print("[BrowserCaptcha] 请使用第三方打码服务: yescaptcha, capmonster, ezcaptcha, capsolver")
 else:
-    if _ensure_nodriver_installed():
-        try:
-            import nodriver as uc
-            NODRIVER_AVAILABLE = True
-        except ImportError as e:
-            debug_logger.log_error(f"[BrowserCaptcha] nodriver 导入失败: {e}")
-            print(f"[BrowserCaptcha] ❌ nodriver 导入失败: {e}")
+    # nodriver 已在 requirements.txt 中声明，不再在导入时 fork pip 安装
+    try:
+        import nodriver as uc
+        NODRIVER_AVAILABLE = True
+    except ImportError as e:
+        debug_logger.log_error(f"[BrowserCaptcha] nodriver 导入失败: {e}，请安装依赖: pip install -r requirements.txt")
+        print(f"[BrowserCaptcha] ❌ nodriver 导入失败: {e}，请安装依赖: pip install -r requirements.txt")
+
+
+# 精简 Chromium 启动参数：关闭打码用不到的后台子系统以降低每个进程的内存与 CPU（nodriver 默认已带的参数不重复添加）
+_MINIMAL_BROWSER_ARGS = (
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-client-side-phishing-detection',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-domain-reliability',
+    # Chromium 对重复的开关只取最后一个值：这里会覆盖 nodriver 默认的 --disable-features，
+    # 因此必须带上其默认的 IsolateOrigins,site-per-process，保持与不精简时相同的站点隔离设置
+    '--disable-features=IsolateOrigins,site-per-process,Translate,BackForwardCache,MediaRouter,OptimizationHints',
+    '--disable-hang-monitor',
+    '--disable-ipc-flooding-protection',
+    '--disable-popup-blocking',
+    '--disable-prompt-on-repost',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--mute-audio',
+)
+
+# 页内每 100ms 检查一次 reCAPTCHA 是否可用，通过 awaitPromise 一次 CDP 往返返回结果
+_WAIT_READY_JS = """
+    new Promise((resolve) => {{
+        const deadline = Date.now() + {timeout_ms};
+        const check = () => {{
+            try {{
+                if ({ready_check}) return resolve(true);
+            }} catch (e) {{}}
+            if (Date.now() >= deadline) return resolve(false);
+            setTimeout(check, 100);
+        }};
+        check();
+    }})
+"""
+
+# 执行 reCAPTCHA 并直接以 Promise 返回 {token} 或 {error}，不再写入 window 临时变量轮询
+_EXECUTE_JS = """
+    new Promise((resolve) => {{
+        const timer = setTimeout(() => resolve({{error: 'timeout'}}), {timeout_ms});
+        const done = (value) => {{
+            clearTimeout(timer);
+            resolve(value);
+        }};
+        try {{
+            {ready_target}(function() {{
+                {execute_target}('{website_key}', {{action: '{action}'}})
+                    .then((token) => done({{token}}))
+                    .catch((err) => done({{error: (err && err.message) || 'execute failed'}}));
+            }});
+        }} catch (e) {{
+            done({{error: e.message || 'exception'}});
+        }}
+    }})
+"""
+
+# 页面已 complete 时立即返回，否则等待 load 事件（超时返回 false）；带刷新前标记的旧文档直接返回 false 以便重试
+_PAGE_LOADED_JS = """
+    new Promise((resolve) => {{
+        if (window.__flow_stale_document) return resolve(false);
+        if (document.readyState === 'complete') return resolve(true);
+        const timer = setTimeout(() => resolve(false), {timeout_ms});
+        window.addEventListener('load', () => {{
+            clearTimeout(timer);
+            resolve(true);
+        }}, {{once: true}});
+    }})
+"""
+
+# 分数测试页：MutationObserver 监听页面文本，匹配到分数立即返回；refresh_ms 后仍无分数则点击刷新按钮，
+# 超时返回最后一次快照（附带 raw_text 便于排查）。正则只编译一次，文本变化合并为每 50ms 最多扫描一次
+_SCORE_WATCH_JS = r"""
+    new Promise((resolve) => {{
+        const patterns = [
+            {{ source: "current_score", regex: /Your score is:\s*([01](?:\.\d+)?)/i }},
+            {{ source: "selected_score", regex: /Selected Score Test:[\s\S]{{0,400}}?Score:\s*([01](?:\.\d+)?)/i }},
+            {{ source: "history_score", regex: /(?:^|\n)\s*Score:\s*([01](?:\.\d+)?)\s*;/i }},
+        ];
+        const uaRe = /Current User Agent:\s*([^\n]+)/i;
+        const ipRe = /Current IP Address:\s*([^\n]+)/i;
+        const refreshRe = /Refresh score now!?/i;
+
+        const scan = (includeRawText) => {{
+            const bodyText = ((document.body && document.body.innerText) || "")
+                .replace(/\u00a0/g, " ")
+                .replace(/\r/g, "");
+            let score = null;
+            let source = "";
+            for (const item of patterns) {{
+                const match = bodyText.match(item.regex);
+                if (!match) continue;
+                const parsed = Number(match[1]);
+                if (!Number.isNaN(parsed) && parsed >= 0 && parsed <= 1) {{
+                    score = parsed;
+                    source = item.source;
+                    break;
+                }}
+            }}
+            if (score === null && !includeRawText) return null;
+            const uaMatch = bodyText.match(uaRe);
+            const ipMatch = bodyText.match(ipRe);
+            return {{
+                score,
+                source,
+                raw_text: bodyText.slice(0, 4000),
+                current_user_agent: uaMatch ? uaMatch[1].trim() : "",
+                current_ip_address: ipMatch ? ipMatch[1].trim() : "",
+                title: document.title || "",
+                url: location.href || "",
+            }};
+        }};
+
+        let done = false;
+        let scanTimer = null;
+        let observer = null;
+        const finish = (result) => {{
+            if (done) return;
+            done = true;
+            if (observer) observer.disconnect();
+            clearTimeout(scanTimer);
+            clearTimeout(refreshTimer);
+            clearTimeout(deadline);
+            resolve(result);
+        }};
+        const check = () => {{
+            scanTimer = null;
+            const result = scan(false);
+            if (result) finish(result);
+        }};
+        const refreshTimer = setTimeout(() => {{
+            try {{
+                const nodes = Array.from(
+                    document.querySelectorAll('button, input[type="button"], input[type="submit"], a')
+                );
+                const target = nodes.find((node) => {{
+                    const text = (node.innerText || node.textContent || node.value || "").trim();
+                    return refreshRe.test(text);
+                }});
+                if (target) target.click();
+            }} catch (e) {{}}
+        }}, {refresh_ms});
+        const deadline = setTimeout(() => finish(scan(true)), {timeout_ms});
+
+        observer = new MutationObserver(() => {{
+            if (!done && scanTimer === null) scanTimer = setTimeout(check, 50);
+        }});
+        observer.observe(document.body || document.documentElement, {{
+            subtree: true,
+            childList: true,
+            characterData: true,
+        }});
+        check();
+    }})
+"""
+
+# 常驻标签页预注册的取 token 辅助函数，之后每次只需发送一行调用（结果结构与 _EXECUTE_JS 一致）
+_TOKEN_HELPER_JS = """
+    window.__flow_get_token = (websiteKey, action, timeoutMs) => new Promise((resolve) => {
+        const timer = setTimeout(() => resolve({error: 'timeout'}), timeoutMs);
+        const done = (value) => {
+            clearTimeout(timer);
+            resolve(value);
+        };
+        try {
+            grecaptcha.enterprise.ready(function() {
+                grecaptcha.enterprise.execute(websiteKey, {action})
+                    .then((token) => done({token}))
+                    .catch((err) => done({error: (err && err.message) || 'execute failed'}));
+            });
+        } catch (e) {
+            done({error: e.message || 'exception'});
+        }
+    });
+"""
+
+_ENTERPRISE_READY_CHECK = (
+    "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && "
+    "typeof grecaptcha.enterprise.execute === 'function'"
+)
+_V3_READY_CHECK = "typeof grecaptcha !== 'undefined' && typeof grecaptcha.execute === 'function'"
+
+# 分数测试页执行前的模拟交互（焦点、鼠标移动、滚动）
+_CUSTOM_INTERACTION_JS = """
+    (() => {
+        try {
+            const body = document.body || document.documentElement;
+            const width = window.innerWidth || 1280;
+            const height = window.innerHeight || 720;
+            const x = Math.max(24, Math.floor(width * 0.38));
+            const y = Math.max(24, Math.floor(height * 0.32));
+            const moveEvent = new MouseEvent('mousemove', {
+                bubbles: true,
+                clientX: x,
+                clientY: y
+            });
+            const overEvent = new MouseEvent('mouseover', {
+                bubbles: true,
+                clientX: x,
+                clientY: y
+            });
+            window.focus();
+            window.dispatchEvent(new Event('focus'));
+            document.dispatchEvent(moveEvent);
+            document.dispatchEvent(overEvent);
+            if (body) {
+                body.dispatchEvent(moveEvent);
+                body.dispatchEvent(overEvent);
+            }
+            window.scrollTo(0, Math.min(320, document.body?.scrollHeight || 320));
+        } catch (e) {}
+    })();
+"""
+# 分数测试页首次预热时追加的滚动/事件，与上面的交互脚本合并为一次 evaluate
+_CUSTOM_WARMUP_JS = """
+    (() => {
+        try {
+            window.scrollTo(0, Math.min(240, document.body.scrollHeight || 240));
+            window.dispatchEvent(new Event('mousemove'));
+            window.dispatchEvent(new Event('focus'));
+        } catch (e) {}
+    })();
+"""
+_CUSTOM_INTERACTION_WITH_WARMUP_JS = _CUSTOM_INTERACTION_JS + _CUSTOM_WARMUP_JS
+
+# Flow 页面中与打码无关的静态资源（字体、图片、视频），打开项目页前通过 Network.setBlockedURLs 屏蔽
+_BLOCKED_RESOURCE_URLS = [
+    "*.woff*", "*.ttf*", "*.otf*",
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*",
+    "*.mp4*", "*.webm*",
+    "*fonts.googleapis.com/*", "*fonts.gstatic.com/*", "*googleusercontent.com/*",
+]
+
+_SESSION_COOKIE_NAME = "__Secure-next-auth.session-token"
+# 只取 Flow 站点作用域内的 cookies，避免遍历浏览器里所有站点的 cookies
+_SESSION_COOKIE_URLS = ["https://labs.google/fx/tools/flow"]
+# 浏览器中的 session-token 剩余有效期超过该值时直接复用，无需刷新页面
+_SESSION_COOKIE_REFRESH_MARGIN_SECONDS = 300
+# 轮换常驻标签页后延迟关闭旧标签页，让仍在其上执行的 grecaptcha.execute 完成
+_RECYCLED_TAB_CLOSE_DELAY_SECONDS = 30
 
 
 class ResidentTabInfo:
@@ -127,6 +309,12 @@ class ResidentTabInfo:
         self.project_id = project_id
         self.recaptcha_ready = False
         self.created_at = time.time()
+        self.last_used_at = self.created_at
+        # 成功生成 token 的次数，达到上限后轮换标签页以回收页面内存
+        self.use_count = 0
+        self.recycling = False
+        # 标签页生命周期内 UA/客户端提示头不变，创建时提取一次
+        self.fingerprint: Optional[Dict[str, Any]] = None
 
 
 class BrowserCaptchaService:
@@ -151,8 +339,10 @@ class BrowserCaptchaService:
         self.user_data_dir = os.path.join(os.getcwd(), "browser_data")
         
         # 常驻模式相关属性 (支持多 project_id)
-        self._resident_tabs: dict[str, 'ResidentTabInfo'] = {}  # project_id -> 常驻标签页信息
-        self._resident_lock = asyncio.Lock()  # 保护常驻标签页操作
+        # project_id -> 常驻标签页信息，按最近使用排序（最久未用的在最前，超出上限时优先淘汰）
+        self._resident_tabs: 'OrderedDict[str, ResidentTabInfo]' = OrderedDict()
+        # 按 project_id 分别加锁：不同项目的创建/刷新可并行，同一项目串行
+        self._resident_locks: dict[str, asyncio.Lock] = {}
         
         # 兼容旧 API（保留 single resident 属性作为别名）
         self.resident_project_id: Optional[str] = None  # 向后兼容
@@ -161,8 +351,16 @@ class BrowserCaptchaService:
         self._recaptcha_ready = False                    # 向后兼容
         self._last_fingerprint: Optional[Dict[str, Any]] = None
         # 自定义站点打码常驻页（用于 score-test）
-        self._custom_tabs: dict[str, Dict[str, Any]] = {}
-        self._custom_lock = asyncio.Lock()
+        self._custom_tabs: OrderedDict[str, Dict[str, Any]] = OrderedDict()  # 按最近使用排序
+        self._custom_locks: dict[str, asyncio.Lock] = {}  # cache_key -> 锁
+        # 同一 Chromium 进程内同时执行的 grecaptcha.execute 上限，避免 V8/网络争用拖慢所有标签页
+        self._execute_semaphore = asyncio.Semaphore(max(1, config.browser_max_concurrent_executes))
+        # 后台预热常驻标签页的任务（close 时取消）
+        self._prewarm_task: Optional[asyncio.Task] = None
+        # project_id -> 正在进行的 Session Token 刷新任务（并发请求共享同一次刷新）
+        self._session_refresh_tasks: dict[str, asyncio.Task] = {}
+        # 后台关闭/轮换标签页的任务（持有引用避免被 GC 提前回收）
+        self._background_tasks: set[asyncio.Task] = set()
 
     @classmethod
     async def get_instance(cls, db=None) -> 'BrowserCaptchaService':
@@ -175,6 +373,10 @@ class BrowserCaptchaService:
     
     def _check_available(self):
         """检查服务是否可用"""
+        global _AVAILABILITY_CHECKED
+        # 环境与依赖在进程内不会变化，通过一次后直接返回
+        if _AVAILABILITY_CHECKED:
+            return
         if IS_DOCKER:
             raise RuntimeError(
                 "内置浏览器打码在 Docker 环境中不可用。"
@@ -185,6 +387,7 @@ class BrowserCaptchaService:
                 "nodriver 未安装或不可用。"
                 "请手动安装: pip install nodriver"
             )
+        _AVAILABILITY_CHECKED = True
 
     async def initialize(self):
         """初始化 nodriver 浏览器"""
@@ -210,19 +413,23 @@ class BrowserCaptchaService:
             # 确保 user_data_dir 存在
             os.makedirs(self.user_data_dir, exist_ok=True)
 
+            browser_args = [
+                '--no-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-setuid-sandbox',
+                '--disable-gpu',
+                '--window-size=1280,720',
+                '--profile-directory=Default',  # 跳过 Profile 选择器页面
+            ]
+            if config.browser_minimal_flags:
+                browser_args.extend(_MINIMAL_BROWSER_ARGS)
+
             # 启动 nodriver 浏览器
             self.browser = await uc.start(
                 headless=self.headless,
                 user_data_dir=self.user_data_dir,
                 sandbox=False,  # nodriver 需要此参数来禁用 sandbox
-                browser_args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-setuid-sandbox',
-                    '--disable-gpu',
-                    '--window-size=1280,720',
-                    '--profile-directory=Default',  # 跳过 Profile 选择器页面
-                ]
+                browser_args=browser_args,
             )
 
             self._initialized = True
@@ -256,28 +463,18 @@ class BrowserCaptchaService:
         
         debug_logger.log_info("[BrowserCaptcha] 标签页已创建，等待页面加载...")
         
-        # 等待页面加载完成（带重试机制）
-        page_loaded = False
-        for retry in range(60):
+        # 等待页面加载完成（页面 load 事件触发即返回；连接丢失时重新创建一次标签页）
+        try:
+            page_loaded = await self._wait_page_loaded(self.resident_tab, 60)
+        except ConnectionRefusedError as e:
+            debug_logger.log_warning(f"[BrowserCaptcha] 标签页连接丢失: {e}，尝试重新获取...")
+            page_loaded = False
             try:
-                await asyncio.sleep(1)
-                ready_state = await self.resident_tab.evaluate("document.readyState")
-                debug_logger.log_info(f"[BrowserCaptcha] 页面状态: {ready_state} (重试 {retry + 1}/60)")
-                if ready_state == "complete":
-                    page_loaded = True
-                    break
-            except ConnectionRefusedError as e:
-                debug_logger.log_warning(f"[BrowserCaptcha] 标签页连接丢失: {e}，尝试重新获取...")
-                # 标签页可能已关闭，尝试重新创建
-                try:
-                    self.resident_tab = await self.browser.get(website_url, new_tab=True)
-                    debug_logger.log_info("[BrowserCaptcha] 已重新创建标签页")
-                except Exception as e2:
-                    debug_logger.log_error(f"[BrowserCaptcha] 重新创建标签页失败: {e2}")
-                await asyncio.sleep(2)
-            except Exception as e:
-                debug_logger.log_warning(f"[BrowserCaptcha] 等待页面异常: {e}，重试 {retry + 1}/15...")
-                await asyncio.sleep(2)
+                self.resident_tab = await self.browser.get(website_url, new_tab=True)
+                debug_logger.log_info("[BrowserCaptcha] 已重新创建标签页")
+                page_loaded = await self._wait_page_loaded(self.resident_tab, 60)
+            except Exception as e2:
+                debug_logger.log_error(f"[BrowserCaptcha] 重新创建标签页失败: {e2}")
         
         if not page_loaded:
             debug_logger.log_error("[BrowserCaptcha] 页面加载超时，常驻模式启动失败")
@@ -299,22 +496,21 @@ class BrowserCaptchaService:
         Args:
             project_id: 指定要关闭的 project_id，如果为 None 则关闭所有常驻标签页
         """
-        async with self._resident_lock:
-            if project_id:
-                # 关闭指定的常驻标签页
+        if project_id:
+            # 关闭指定的常驻标签页
+            async with self._resident_lock_for(project_id):
                 await self._close_resident_tab(project_id)
-                debug_logger.log_info(f"[BrowserCaptcha] 已关闭 project_id={project_id} 的常驻模式")
-            else:
-                # 关闭所有常驻标签页
-                project_ids = list(self._resident_tabs.keys())
-                for pid in project_ids:
-                    resident_info = self._resident_tabs.pop(pid, None)
-                    if resident_info and resident_info.tab:
-                        try:
-                            await resident_info.tab.close()
-                        except Exception:
-                            pass
-                debug_logger.log_info(f"[BrowserCaptcha] 已关闭所有常驻标签页 (共 {len(project_ids)} 个)")
+            debug_logger.log_info(f"[BrowserCaptcha] 已关闭 project_id={project_id} 的常驻模式")
+        else:
+            # 关闭所有常驻标签页（先整体换出字典，关闭过程中不会再被其他请求取到）
+            resident_tabs, self._resident_tabs = self._resident_tabs, OrderedDict()
+            for resident_info in resident_tabs.values():
+                if resident_info and resident_info.tab:
+                    try:
+                        await resident_info.tab.close()
+                    except Exception:
+                        pass
+            debug_logger.log_info(f"[BrowserCaptcha] 已关闭所有常驻标签页 (共 {len(resident_tabs)} 个)")
         
         # 向后兼容：清理旧属性
         if not self._running:
@@ -340,11 +536,9 @@ class BrowserCaptchaService:
         debug_logger.log_info("[BrowserCaptcha] 检测 reCAPTCHA...")
         
         # 检查 grecaptcha.enterprise.execute
-        is_enterprise = await tab.evaluate(
-            "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && typeof grecaptcha.enterprise.execute === 'function'"
-        )
+        is_enterprise = await tab.evaluate(_ENTERPRISE_READY_CHECK)
         
-        if is_enterprise:
+        if is_enterprise is True:
             debug_logger.log_info("[BrowserCaptcha] reCAPTCHA Enterprise 已加载")
             return True
         
@@ -361,23 +555,51 @@ class BrowserCaptchaService:
             }})()
         """)
         
-        # 等待脚本加载
-        await tab.sleep(3)
-        
-        # 轮询等待 reCAPTCHA 加载
-        for i in range(20):
-            is_enterprise = await tab.evaluate(
-                "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && typeof grecaptcha.enterprise.execute === 'function'"
-            )
-            
-            if is_enterprise:
-                debug_logger.log_info(f"[BrowserCaptcha] reCAPTCHA Enterprise 已加载（等待了 {i * 0.5} 秒）")
-                return True
-            await tab.sleep(0.5)
+        # 页内等待脚本加载，就绪即返回（上限与原先 3s + 20 次 0.5s 轮询一致）
+        started_at = time.monotonic()
+        if await self._wait_ready_in_page(tab, _ENTERPRISE_READY_CHECK, 13):
+            debug_logger.log_info(f"[BrowserCaptcha] reCAPTCHA Enterprise 已加载（等待了 {time.monotonic() - started_at:.1f} 秒）")
+            return True
         
         debug_logger.log_warning("[BrowserCaptcha] reCAPTCHA 加载超时")
         return False
 
+    async def _wait_page_loaded(self, tab, timeout_seconds: float) -> bool:
+        """等待页面 readyState 变为 complete；导航过程中执行上下文被替换时短暂退避后重新挂监听
+
+        ConnectionRefusedError（标签页已失效）向上抛出，由调用方决定是否重建。
+        """
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                script = _PAGE_LOADED_JS.format(timeout_ms=int(remaining * 1000))
+                if await self._evaluate_promise(tab, script, remaining + 2) is True:
+                    return True
+            except ConnectionRefusedError:
+                raise
+            except Exception as e:
+                debug_logger.log_warning(f"[BrowserCaptcha] 等待页面异常: {e}")
+            await asyncio.sleep(0.2)
+
+    async def _evaluate_promise(self, tab, expression: str, timeout: float) -> Any:
+        """以 awaitPromise 方式执行脚本，结果就绪时一次往返返回；超时返回 None"""
+        try:
+            return await asyncio.wait_for(
+                tab.evaluate(expression, await_promise=True, return_by_value=True),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            return None
+
+    async def _wait_ready_in_page(self, tab, ready_check: str, timeout_seconds: float) -> bool:
+        """在页面内轮询 ready_check，直到为真或超时"""
+        script = _WAIT_READY_JS.format(timeout_ms=int(timeout_seconds * 1000), ready_check=ready_check)
+        # nodriver 对假值返回 RemoteObject，必须与 True 比较
+        return await self._evaluate_promise(tab, script, timeout_seconds + 2) is True
+
     async def _wait_for_custom_recaptcha(
         self,
         tab,
@@ -387,17 +609,12 @@ class BrowserCaptchaService:
         """等待任意站点的 reCAPTCHA 加载，用于分数测试。"""
         debug_logger.log_info("[BrowserCaptcha] 检测自定义 reCAPTCHA...")
 
-        ready_check = (
-            "typeof grecaptcha !== 'undefined' && typeof grecaptcha.enterprise !== 'undefined' && "
-            "typeof grecaptcha.enterprise.execute === 'function'"
-        ) if enterprise else (
-            "typeof grecaptcha !== 'undefined' && typeof grecaptcha.execute === 'function'"
-        )
+        ready_check = _ENTERPRISE_READY_CHECK if enterprise else _V3_READY_CHECK
         script_path = "recaptcha/enterprise.js" if enterprise else "recaptcha/api.js"
         label = "Enterprise" if enterprise else "V3"
 
         is_ready = await tab.evaluate(ready_check)
-        if is_ready:
+        if is_ready is True:
             debug_logger.log_info(f"[BrowserCaptcha] 自定义 reCAPTCHA {label} 已加载")
             return True
 
@@ -412,75 +629,105 @@ class BrowserCaptchaService:
             }})()
         """)
 
-        await tab.sleep(3)
-        for i in range(20):
-            is_ready = await tab.evaluate(ready_check)
-            if is_ready:
-                debug_logger.log_info(f"[BrowserCaptcha] 自定义 reCAPTCHA {label} 已加载（等待了 {i * 0.5} 秒）")
-                return True
-            await tab.sleep(0.5)
+        started_at = time.monotonic()
+        if await self._wait_ready_in_page(tab, ready_check, 13):
+            debug_logger.log_info(f"[BrowserCaptcha] 自定义 reCAPTCHA {label} 已加载（等待了 {time.monotonic() - started_at:.1f} 秒）")
+            return True
 
         debug_logger.log_warning("[BrowserCaptcha] 自定义 reCAPTCHA 加载超时")
         return False
 
-    async def _execute_recaptcha_on_tab(self, tab, action: str = "IMAGE_GENERATION") -> Optional[str]:
+    async def _execute_recaptcha_on_tab(
+        self,
+        tab,
+        action: str = "IMAGE_GENERATION",
+        preinjected: bool = False,
+    ) -> Optional[str]:
         """在指定标签页执行 reCAPTCHA 获取 token
         
         Args:
             tab: nodriver 标签页对象
             action: reCAPTCHA action类型 (IMAGE_GENERATION 或 VIDEO_GENERATION)
+            preinjected: 标签页已通过 _install_token_helper 注册辅助函数（常驻标签页）
             
         Returns:
             reCAPTCHA token 或 None
         """
-        # 生成唯一变量名避免冲突
-        ts = int(time.time() * 1000)
-        token_var = f"_recaptcha_token_{ts}"
-        error_var = f"_recaptcha_error_{ts}"
-        
-        execute_script = f"""
-            (() => {{
-                window.{token_var} = null;
-                window.{error_var} = null;
-                
-                try {{
-                    grecaptcha.enterprise.ready(function() {{
-                        grecaptcha.enterprise.execute('{self.website_key}', {{action: '{action}'}})
-                            .then(function(token) {{
-                                window.{token_var} = token;
-                            }})
-                            .catch(function(err) {{
-                                window.{error_var} = err.message || 'execute failed';
-                            }});
-                    }});
-                }} catch (e) {{
-                    window.{error_var} = e.message || 'exception';
-                }}
-            }})()
+        token, _ = await self._execute_recaptcha_with_status(tab, action, preinjected)
+        return token
+
+    async def _execute_recaptcha_with_status(
+        self,
+        tab,
+        action: str,
+        preinjected: bool,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """同 _execute_recaptcha_on_tab，额外返回失败原因（超时为 "timeout"）"""
+        async with self._execute_semaphore:
+            result = None
+            if preinjected:
+                result = await self._evaluate_promise(
+                    tab,
+                    f"typeof window.__flow_get_token === 'function' "
+                    f"? window.__flow_get_token('{self.website_key}', '{action}', 15000) "
+                    f": {{helper_missing: true}}",
+                    20,
+                )
+            if not preinjected or (isinstance(result, dict) and result.get("helper_missing")):
+                execute_script = _EXECUTE_JS.format(
+                    timeout_ms=15000,
+                    ready_target="grecaptcha.enterprise.ready",
+                    execute_target="grecaptcha.enterprise.execute",
+                    website_key=self.website_key,
+                    action=action,
+                )
+                result = await self._evaluate_promise(tab, execute_script, 20)
+        return self._unpack_execute_result(result, "")
+
+    async def _install_token_helper(self, tab):
+        """为常驻标签页注册 __flow_get_token：当前文档立即执行，后续刷新/导航由浏览器自动注入"""
+        try:
+            await tab.send(uc.cdp.page.add_script_to_evaluate_on_new_document(source=_TOKEN_HELPER_JS))
+            await tab.evaluate(_TOKEN_HELPER_JS)
+        except Exception as e:
+            # 注册失败不影响打码，执行时会回退为发送完整脚本
+            debug_logger.log_warning(f"[BrowserCaptcha] 注册 token 辅助函数失败: {e}")
+
+    async def _execute_with_retry(
+        self,
+        tab,
+        action: str,
+        max_retries: int = 2,
+        base_delay: float = 0.25,
+    ) -> Optional[str]:
+        """在常驻标签页上重试 execute（指数退避 + 抖动），用于 reCAPTCHA 偶发返回空 token 的情况
+
+        超时说明标签页可能已卡死，不再重试，直接返回 None 交由调用方重建；
+        标签页本身的异常直接抛出，同样由调用方重建标签页。
         """
-        
-        # 注入执行脚本
-        await tab.evaluate(execute_script)
-        
-        # 轮询等待结果（最多 15 秒）
-        token = None
-        for i in range(30):
-            await tab.sleep(0.5)
-            token = await tab.evaluate(f"window.{token_var}")
+        for retry in range(max_retries + 1):
+            token, error = await self._execute_recaptcha_with_status(tab, action, preinjected=True)
+            if token or error == "timeout" or retry >= max_retries:
+                return token
+            delay = base_delay * (2 ** retry) * (0.5 + random.random())
+            debug_logger.log_warning(
+                f"[BrowserCaptcha] Token 生成失败，{delay:.2f}s 后重试 ({retry + 1}/{max_retries})"
+            )
+            await asyncio.sleep(delay)
+        return None
+
+    def _unpack_execute_result(self, result: Any, label: str) -> Tuple[Optional[str], Optional[str]]:
+        """解析 _EXECUTE_JS 的返回值为 (token, error)；失败时记录错误，超时统一为 timeout"""
+        if isinstance(result, dict):
+            token = result.get("token")
             if token:
-                break
-            error = await tab.evaluate(f"window.{error_var}")
-            if error:
-                debug_logger.log_error(f"[BrowserCaptcha] reCAPTCHA 错误: {error}")
-                break
-        
-        # 清理临时变量
-        try:
-            await tab.evaluate(f"delete window.{token_var}; delete window.{error_var};")
-        except:
-            pass
-        
-        return token
+                return token, None
+            error = result.get("error") or "empty token"
+        else:
+            # 超时或脚本异常（nodriver 返回 ExceptionDetails）
+            error = "timeout" if result is None else str(result)[:200]
+        debug_logger.log_error(f"[BrowserCaptcha] {label}reCAPTCHA 错误: {error}")
+        return None, error
 
     async def _execute_custom_recaptcha_on_tab(
         self,
@@ -490,49 +737,17 @@ class BrowserCaptchaService:
         enterprise: bool = False,
     ) -> Optional[str]:
         """在指定标签页执行任意站点的 reCAPTCHA。"""
-        ts = int(time.time() * 1000)
-        token_var = f"_custom_recaptcha_token_{ts}"
-        error_var = f"_custom_recaptcha_error_{ts}"
         execute_target = "grecaptcha.enterprise.execute" if enterprise else "grecaptcha.execute"
-
-        execute_script = f"""
-            (() => {{
-                window.{token_var} = null;
-                window.{error_var} = null;
-
-                try {{
-                    grecaptcha.ready(function() {{
-                        {execute_target}('{website_key}', {{action: '{action}'}})
-                            .then(function(token) {{
-                                window.{token_var} = token;
-                            }})
-                            .catch(function(err) {{
-                                window.{error_var} = err.message || 'execute failed';
-                            }});
-                    }});
-                }} catch (e) {{
-                    window.{error_var} = e.message || 'exception';
-                }}
-            }})()
-        """
-
-        await tab.evaluate(execute_script)
-
-        token = None
-        for _ in range(30):
-            await tab.sleep(0.5)
-            token = await tab.evaluate(f"window.{token_var}")
-            if token:
-                break
-            error = await tab.evaluate(f"window.{error_var}")
-            if error:
-                debug_logger.log_error(f"[BrowserCaptcha] 自定义 reCAPTCHA 错误: {error}")
-                break
-
-        try:
-            await tab.evaluate(f"delete window.{token_var}; delete window.{error_var};")
-        except:
-            pass
+        execute_script = _EXECUTE_JS.format(
+            timeout_ms=15000,
+            ready_target="grecaptcha.ready",
+            execute_target=execute_target,
+            website_key=website_key,
+            action=action,
+        )
+        async with self._execute_semaphore:
+            result = await self._evaluate_promise(tab, execute_script, 20)
+        token, _ = self._unpack_execute_result(result, "自定义 ")
 
         if token:
             post_wait_seconds = 3
@@ -552,104 +767,43 @@ class BrowserCaptchaService:
         """直接读取测试页面展示的分数，避免 verify.php 与页面显示口径不一致。"""
         _ = token
         _ = verify_url
-        started_at = time.time()
+        started_at = time.monotonic()
         timeout_seconds = 25.0
-        refresh_clicked = False
-        last_snapshot: Dict[str, Any] = {}
 
         try:
             timeout_seconds = float(getattr(config, "browser_score_dom_wait_seconds", 25) or 25)
         except Exception:
             pass
 
-        while (time.time() - started_at) < timeout_seconds:
-            try:
-                result = await tab.evaluate("""
-                    (() => {
-                        const bodyText = ((document.body && document.body.innerText) || "")
-                            .replace(/\\u00a0/g, " ")
-                            .replace(/\\r/g, "");
-                        const patterns = [
-                            { source: "current_score", regex: /Your score is:\\s*([01](?:\\.\\d+)?)/i },
-                            { source: "selected_score", regex: /Selected Score Test:[\\s\\S]{0,400}?Score:\\s*([01](?:\\.\\d+)?)/i },
-                            { source: "history_score", regex: /(?:^|\\n)\\s*Score:\\s*([01](?:\\.\\d+)?)\\s*;/i },
-                        ];
-                        let score = null;
-                        let source = "";
-                        for (const item of patterns) {
-                            const match = bodyText.match(item.regex);
-                            if (!match) continue;
-                            const parsed = Number(match[1]);
-                            if (!Number.isNaN(parsed) && parsed >= 0 && parsed <= 1) {
-                                score = parsed;
-                                source = item.source;
-                                break;
-                            }
-                        }
-                        const uaMatch = bodyText.match(/Current User Agent:\\s*([^\\n]+)/i);
-                        const ipMatch = bodyText.match(/Current IP Address:\\s*([^\\n]+)/i);
-                        return {
-                            score,
-                            source,
-                            raw_text: bodyText.slice(0, 4000),
-                            current_user_agent: uaMatch ? uaMatch[1].trim() : "",
-                            current_ip_address: ipMatch ? ipMatch[1].trim() : "",
-                            title: document.title || "",
-                            url: location.href || "",
-                        };
-                    })()
-                """)
-            except Exception as e:
-                result = {"error": f"{type(e).__name__}: {str(e)[:200]}"}
-
-            if isinstance(result, dict):
-                last_snapshot = result
-                score = result.get("score")
-                if isinstance(score, (int, float)):
-                    elapsed_ms = int((time.time() - started_at) * 1000)
-                    return {
-                        "verify_mode": "browser_page_dom",
-                        "verify_elapsed_ms": elapsed_ms,
-                        "verify_http_status": None,
-                        "verify_result": {
-                            "success": True,
-                            "score": score,
-                            "source": result.get("source") or "antcpt_dom",
-                            "raw_text": result.get("raw_text") or "",
-                            "current_user_agent": result.get("current_user_agent") or "",
-                            "current_ip_address": result.get("current_ip_address") or "",
-                            "page_title": result.get("title") or "",
-                            "page_url": result.get("url") or "",
-                        },
-                    }
-
-            if not refresh_clicked and (time.time() - started_at) >= 2:
-                refresh_clicked = True
-                try:
-                    await tab.evaluate("""
-                        (() => {
-                            const nodes = Array.from(
-                                document.querySelectorAll('button, input[type="button"], input[type="submit"], a')
-                            );
-                            const target = nodes.find((node) => {
-                                const text = (node.innerText || node.textContent || node.value || "").trim();
-                                return /Refresh score now!?/i.test(text);
-                            });
-                            if (target) {
-                                target.click();
-                                return true;
-                            }
-                            return false;
-                        })()
-                    """)
-                except Exception:
-                    pass
-
-            await tab.sleep(0.5)
+        # 页内 MutationObserver 监听分数出现，一次 awaitPromise 往返取回结果；2 秒后仍无分数由页面自行点击刷新
+        script = _SCORE_WATCH_JS.format(timeout_ms=int(timeout_seconds * 1000), refresh_ms=2000)
+        try:
+            result = await self._evaluate_promise(tab, script, timeout_seconds + 5)
+            if result is None:
+                result = {"error": "等待页面分数超时"}
+            elif not isinstance(result, dict):
+                result = {"error": str(result)[:200]}
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {str(e)[:200]}"}
 
-        elapsed_ms = int((time.time() - started_at) * 1000)
-        if not isinstance(last_snapshot, dict):
-            last_snapshot = {"raw": last_snapshot}
+        elapsed_ms = int((time.monotonic() - started_at) * 1000)
+        score = result.get("score")
+        if isinstance(score, (int, float)):
+            return {
+                "verify_mode": "browser_page_dom",
+                "verify_elapsed_ms": elapsed_ms,
+                "verify_http_status": None,
+                "verify_result": {
+                    "success": True,
+                    "score": score,
+                    "source": result.get("source") or "antcpt_dom",
+                    "raw_text": result.get("raw_text") or "",
+                    "current_user_agent": result.get("current_user_agent") or "",
+                    "current_ip_address": result.get("current_ip_address") or "",
+                    "page_title": result.get("title") or "",
+                    "page_url": result.get("url") or "",
+                },
+            }
 
         return {
             "verify_mode": "browser_page_dom",
@@ -659,20 +813,27 @@ class BrowserCaptchaService:
                 "success": False,
                 "score": None,
                 "source": "antcpt_dom_timeout",
-                "raw_text": last_snapshot.get("raw_text") or "",
-                "current_user_agent": last_snapshot.get("current_user_agent") or "",
-                "current_ip_address": last_snapshot.get("current_ip_address") or "",
-                "page_title": last_snapshot.get("title") or "",
-                "page_url": last_snapshot.get("url") or "",
-                "error": last_snapshot.get("error") or "未在页面中读取到分数",
+                "raw_text": result.get("raw_text") or "",
+                "current_user_agent": result.get("current_user_agent") or "",
+                "current_ip_address": result.get("current_ip_address") or "",
+                "page_title": result.get("title") or "",
+                "page_url": result.get("url") or "",
+                "error": result.get("error") or "未在页面中读取到分数",
             },
         }
 
+    async def _resident_fingerprint(self, resident_info: ResidentTabInfo) -> Optional[Dict[str, Any]]:
+        """返回常驻标签页缓存的指纹，创建时未取到才重新提取"""
+        if resident_info.fingerprint is None:
+            resident_info.fingerprint = await self._extract_tab_fingerprint(resident_info.tab)
+        return resident_info.fingerprint
+
     async def _extract_tab_fingerprint(self, tab) -> Optional[Dict[str, Any]]:
         """从 nodriver 标签页提取浏览器指纹信息。"""
         try:
+            # 立即调用并按值返回：直接求值箭头函数只会拿到函数本身，深度序列化的对象也不是 dict
             fingerprint = await tab.evaluate("""
-                () => {
+                (() => {
                     const ua = navigator.userAgent || "";
                     const lang = navigator.language || "";
                     const uaData = navigator.userAgentData || null;
@@ -699,8 +860,8 @@ class BrowserCaptchaService:
                         sec_ch_ua_mobile: secChUaMobile,
                         sec_ch_ua_platform: secChUaPlatform,
                     };
-                }
-            """)
+                })()
+            """, return_by_value=True)
             if not isinstance(fingerprint, dict):
                 return None
 
@@ -735,30 +896,36 @@ class BrowserCaptchaService:
         await self.initialize()
         self._last_fingerprint = None
         
-        # 尝试从常驻标签页获取 token
-        async with self._resident_lock:
-            resident_info = self._resident_tabs.get(project_id)
-            
-            # 如果该 project_id 没有常驻标签页，则自动创建
-            if resident_info is None:
-                debug_logger.log_info(f"[BrowserCaptcha] project_id={project_id} 没有常驻标签页，正在创建...")
-                resident_info = await self._create_resident_tab(project_id)
+        # 尝试从常驻标签页获取 token（已存在时直接使用，无需加锁）
+        resident_info = self._resident_tabs.get(project_id)
+        if resident_info is not None:
+            self._touch_resident_tab(project_id, resident_info)
+        else:
+            async with self._resident_lock_for(project_id):
+                # 等锁期间可能已由同项目的其他请求创建
+                resident_info = self._resident_tabs.get(project_id)
+                
+                # 如果该 project_id 没有常驻标签页，则自动创建
                 if resident_info is None:
-                    debug_logger.log_warning(f"[BrowserCaptcha] 无法为 project_id={project_id} 创建常驻标签页，fallback 到传统模式")
-                    return await self._get_token_legacy(project_id, action)
-                self._resident_tabs[project_id] = resident_info
-                debug_logger.log_info(f"[BrowserCaptcha] ✅ 已为 project_id={project_id} 创建常驻标签页 (当前共 {len(self._resident_tabs)} 个)")
+                    debug_logger.log_info(f"[BrowserCaptcha] project_id={project_id} 没有常驻标签页，正在创建...")
+                    resident_info = await self._create_resident_tab(project_id)
+                    if resident_info is None:
+                        debug_logger.log_warning(f"[BrowserCaptcha] 无法为 project_id={project_id} 创建常驻标签页，fallback 到传统模式")
+                        return await self._get_token_legacy(project_id, action)
+                    await self._store_resident_tab(project_id, resident_info)
+                    debug_logger.log_info(f"[BrowserCaptcha] ✅ 已为 project_id={project_id} 创建常驻标签页 (当前共 {len(self._resident_tabs)} 个)")
         
         # 使用常驻标签页生成 token
         if resident_info and resident_info.recaptcha_ready and resident_info.tab:
-            start_time = time.time()
+            start_time = time.monotonic()
             debug_logger.log_info(f"[BrowserCaptcha] 从常驻标签页即时生成 token (project: {project_id}, action: {action})...")
             try:
-                token = await self._execute_recaptcha_on_tab(resident_info.tab, action)
-                duration_ms = (time.time() - start_time) * 1000
+                token = await self._execute_with_retry(resident_info.tab, action)
+                duration_ms = (time.monotonic() - start_time) * 1000
                 if token:
-                    self._last_fingerprint = await self._extract_tab_fingerprint(resident_info.tab)
+                    self._last_fingerprint = await self._resident_fingerprint(resident_info)
                     debug_logger.log_info(f"[BrowserCaptcha] ✅ Token生成成功（耗时 {duration_ms:.0f}ms）")
+                    self._maybe_recycle_resident_tab(project_id, resident_info)
                     return token
                 else:
                     debug_logger.log_warning(f"[BrowserCaptcha] 常驻标签页生成失败 (project: {project_id})，尝试重建...")
@@ -766,16 +933,16 @@ class BrowserCaptchaService:
                 debug_logger.log_warning(f"[BrowserCaptcha] 常驻标签页异常: {e}，尝试重建...")
             
             # 常驻标签页失效，尝试重建
-            async with self._resident_lock:
-                await self._close_resident_tab(project_id)
+            async with self._resident_lock_for(project_id):
+                self._discard_resident_tab(project_id)
                 resident_info = await self._create_resident_tab(project_id)
                 if resident_info:
-                    self._resident_tabs[project_id] = resident_info
+                    await self._store_resident_tab(project_id, resident_info)
                     # 重建后立即尝试生成
                     try:
-                        token = await self._execute_recaptcha_on_tab(resident_info.tab, action)
+                        token = await self._execute_recaptcha_on_tab(resident_info.tab, action, preinjected=True)
                         if token:
-                            self._last_fingerprint = await self._extract_tab_fingerprint(resident_info.tab)
+                            self._last_fingerprint = await self._resident_fingerprint(resident_info)
                             debug_logger.log_info(f"[BrowserCaptcha] ✅ 重建后 Token生成成功")
                             return token
                     except Exception:
@@ -785,6 +952,20 @@ class BrowserCaptchaService:
         debug_logger.log_warning(f"[BrowserCaptcha] 所有常驻方式失败，fallback 到传统模式 (project: {project_id})")
         return await self._get_token_legacy(project_id, action)
 
+    async def _open_flow_tab(self, website_url: str, new_tab: bool = False):
+        """打开 Flow 项目页；启用资源屏蔽时先打开空白页设置屏蔽规则再导航，首次加载即生效"""
+        if not config.browser_block_static_resources:
+            return await self.browser.get(website_url, new_tab=new_tab)
+
+        tab = await self.browser.get("about:blank", new_tab=new_tab)
+        try:
+            await tab.send(uc.cdp.network.enable())
+            await tab.send(uc.cdp.network.set_blocked_ur_ls(urls=_BLOCKED_RESOURCE_URLS))
+        except Exception as e:
+            debug_logger.log_warning(f"[BrowserCaptcha] 设置资源屏蔽失败，按原样加载页面: {e}")
+        await tab.get(website_url)
+        return tab
+
     async def _create_resident_tab(self, project_id: str) -> Optional[ResidentTabInfo]:
         """为指定 project_id 创建常驻标签页
         
@@ -799,23 +980,14 @@ class BrowserCaptchaService:
             debug_logger.log_info(f"[BrowserCaptcha] 为 project_id={project_id} 创建常驻标签页，访问: {website_url}")
             
             # 创建新标签页
-            tab = await self.browser.get(website_url, new_tab=True)
+            tab = await self._open_flow_tab(website_url, new_tab=True)
             
-            # 等待页面加载完成
-            page_loaded = False
-            for retry in range(60):
-                try:
-                    await asyncio.sleep(1)
-                    ready_state = await tab.evaluate("document.readyState")
-                    if ready_state == "complete":
-                        page_loaded = True
-                        break
-                except ConnectionRefusedError as e:
-                    debug_logger.log_warning(f"[BrowserCaptcha] 标签页连接丢失: {e}")
-                    return None
-                except Exception as e:
-                    debug_logger.log_warning(f"[BrowserCaptcha] 等待页面异常: {e}，重试 {retry + 1}/60...")
-                    await asyncio.sleep(1)
+            # 等待页面加载完成（load 事件触发即返回）
+            try:
+                page_loaded = await self._wait_page_loaded(tab, 60)
+            except ConnectionRefusedError as e:
+                debug_logger.log_warning(f"[BrowserCaptcha] 标签页连接丢失: {e}")
+                return None
             
             if not page_loaded:
                 debug_logger.log_error(f"[BrowserCaptcha] 页面加载超时 (project: {project_id})")
@@ -839,6 +1011,8 @@ class BrowserCaptchaService:
             # 创建常驻信息对象
             resident_info = ResidentTabInfo(tab, project_id)
             resident_info.recaptcha_ready = True
+            await self._install_token_helper(tab)
+            resident_info.fingerprint = await self._extract_tab_fingerprint(tab)
             
             debug_logger.log_info(f"[BrowserCaptcha] ✅ 常驻标签页创建成功 (project: {project_id})")
             return resident_info
@@ -847,6 +1021,173 @@ class BrowserCaptchaService:
             debug_logger.log_error(f"[BrowserCaptcha] 创建常驻标签页异常: {e}")
             return None
 
+    def start_prewarm(self, project_ids: list[str], concurrency: int = 4):
+        """在后台为已知 project_id 预先创建常驻标签页，首个请求即可直接走常驻标签页"""
+        if self._prewarm_task and not self._prewarm_task.done():
+            return
+        self._prewarm_task = asyncio.create_task(self.prewarm_resident_tabs(project_ids, concurrency))
+
+    async def prewarm_resident_tabs(self, project_ids: list[str], concurrency: int = 4):
+        """并发（最多 concurrency 个）创建常驻标签页，已存在的 project_id 跳过"""
+        try:
+            await self.initialize()
+        except Exception as e:
+            debug_logger.log_warning(f"[BrowserCaptcha] 预热常驻标签页失败: {e}")
+            return
+
+        pending = [pid for pid in dict.fromkeys(project_ids) if pid and pid not in self._resident_tabs]
+        max_tabs = config.browser_max_resident_tabs
+        if max_tabs > 0:
+            # 超出上限的预热只会立刻被 LRU 淘汰，直接截断
+            pending = pending[:max(0, max_tabs - len(self._resident_tabs))]
+        if not pending:
+            return
+
+        debug_logger.log_info(f"[BrowserCaptcha] 开始预热 {len(pending)} 个常驻标签页...")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(project_id: str):
+            async with semaphore:
+                if project_id in self._resident_tabs:
+                    return
+                resident_info = await self._create_resident_tab(project_id)
+            if resident_info is None:
+                return
+            async with self._resident_lock_for(project_id):
+                if project_id in self._resident_tabs:
+                    # 预热期间已由请求创建，关闭多余的标签页
+                    try:
+                        await resident_info.tab.close()
+                    except Exception:
+                        pass
+                    return
+                await self._store_resident_tab(project_id, resident_info)
+
+        await asyncio.gather(*(warm(pid) for pid in pending))
+        debug_logger.log_info(f"[BrowserCaptcha] 常驻标签页预热完成 (当前共 {len(self._resident_tabs)} 个)")
+
+    def _resident_lock_for(self, project_id: str) -> asyncio.Lock:
+        """获取 project_id 对应的锁（事件循环单线程，setdefault 即可保证唯一）"""
+        return self._resident_locks.setdefault(project_id, asyncio.Lock())
+
+    def _custom_lock_for(self, cache_key: str) -> asyncio.Lock:
+        """获取自定义站点测试页对应的锁"""
+        return self._custom_locks.setdefault(cache_key, asyncio.Lock())
+
+    def _store_custom_tab(self, cache_key: str, custom_info: Dict[str, Any]):
+        """登记自定义测试页，超过 browser_max_custom_tabs 时关闭最久未使用且空闲的测试页"""
+        self._custom_tabs[cache_key] = custom_info
+        self._custom_tabs.move_to_end(cache_key)
+
+        max_tabs = config.browser_max_custom_tabs
+        if max_tabs <= 0:
+            return
+        excess = len(self._custom_tabs) - max_tabs
+        for evicted_key in list(self._custom_tabs.keys()):
+            if excess <= 0:
+                break
+            lock = self._custom_locks.get(evicted_key)
+            if evicted_key == cache_key or (lock is not None and lock.locked()):
+                continue
+            evicted = self._custom_tabs.pop(evicted_key)
+            self._custom_locks.pop(evicted_key, None)
+            excess -= 1
+            debug_logger.log_info(f"[BrowserCaptcha] [Custom] 测试页超过上限 {max_tabs}，关闭最久未使用的: {evicted_key}")
+            tab = evicted.get("tab") if isinstance(evicted, dict) else None
+            if tab:
+                self._close_tab_in_background(tab)
+
+    def _touch_resident_tab(self, project_id: str, resident_info: ResidentTabInfo):
+        """标记常驻标签页最近被使用
+
+        无需持锁：取出标签页到 move_to_end 之间没有 await，协程之间不会交错，
+        get_token / _refresh_session_token_once 的无锁快速路径直接调用。
+        """
+        resident_info.last_used_at = time.time()
+        self._resident_tabs.move_to_end(project_id)
+
+    async def _store_resident_tab(self, project_id: str, resident_info: ResidentTabInfo):
+        """登记常驻标签页，超过 browser_max_resident_tabs 时关闭最久未使用的标签页
+
+        需在该 project_id 的锁内调用：锁保证"检查是否已存在 → 创建 → 登记"不会被同项目的其他请求重复执行，
+        LRU 记录本身与 _touch_resident_tab 一样无需持锁。
+        """
+        self._resident_tabs[project_id] = resident_info
+        self._touch_resident_tab(project_id, resident_info)
+
+        max_tabs = config.browser_max_resident_tabs
+        while max_tabs > 0 and len(self._resident_tabs) > max_tabs:
+            evicted_id, evicted = self._resident_tabs.popitem(last=False)
+            debug_logger.log_info(
+                f"[BrowserCaptcha] 常驻标签页超过上限 {max_tabs}，关闭最久未使用的 project_id={evicted_id}"
+            )
+            if evicted.tab:
+                # 无锁快速路径上可能仍有请求在该标签页执行，与轮换一样延迟关闭
+                self._close_tab_in_background(evicted.tab, delay=_RECYCLED_TAB_CLOSE_DELAY_SECONDS)
+
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _close_tab_in_background(self, tab, delay: float = 0):
+        """在后台关闭标签页：失效标签页的 close 可能要等 CDP 超时，不应阻塞调用方随后的重建/取 token
+
+        delay 用于轮换场景，给仍在旧标签页上执行的请求留出完成时间。
+        """
+        async def _close():
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await tab.close()
+            except Exception as e:
+                debug_logger.log_warning(f"[BrowserCaptcha] 关闭标签页时异常: {e}")
+
+        self._run_in_background(_close())
+
+    def _maybe_recycle_resident_tab(self, project_id: str, resident_info: ResidentTabInfo):
+        """成功生成 token 后计数；使用次数或存活时间超限时在后台轮换标签页"""
+        resident_info.use_count += 1
+        if resident_info.recycling:
+            return
+        max_uses = config.browser_resident_tab_max_uses
+        max_age = config.browser_resident_tab_max_age_seconds
+        if (max_uses > 0 and resident_info.use_count >= max_uses) or (
+            max_age > 0 and time.time() - resident_info.created_at >= max_age
+        ):
+            resident_info.recycling = True
+            self._run_in_background(self._recycle_resident_tab(project_id, resident_info))
+
+    async def _recycle_resident_tab(self, project_id: str, old_info: ResidentTabInfo):
+        """先建好新标签页再替换旧的，轮换期间请求继续使用旧标签页"""
+        debug_logger.log_info(
+            f"[BrowserCaptcha] 轮换常驻标签页 project_id={project_id} (已使用 {old_info.use_count} 次)"
+        )
+        try:
+            new_info = await self._create_resident_tab(project_id)
+        except Exception as e:
+            debug_logger.log_warning(f"[BrowserCaptcha] 轮换常驻标签页失败: {e}")
+            new_info = None
+        if new_info is None:
+            # 下次成功生成 token 时再尝试
+            old_info.recycling = False
+            return
+
+        async with self._resident_lock_for(project_id):
+            if self._resident_tabs.get(project_id) is not old_info:
+                # 轮换期间旧标签页已被重建或移除，丢弃新建的标签页
+                self._close_tab_in_background(new_info.tab)
+                return
+            await self._store_resident_tab(project_id, new_info)
+        self._close_tab_in_background(old_info.tab, delay=_RECYCLED_TAB_CLOSE_DELAY_SECONDS)
+
+    def _discard_resident_tab(self, project_id: str):
+        """移除失效的常驻标签页并在后台关闭，调用方可立即重建"""
+        resident_info = self._resident_tabs.pop(project_id, None)
+        if resident_info and resident_info.tab:
+            self._close_tab_in_background(resident_info.tab)
+            debug_logger.log_info(f"[BrowserCaptcha] 已移除 project_id={project_id} 的失效常驻标签页")
+
     async def _close_resident_tab(self, project_id: str):
         """关闭指定 project_id 的常驻标签页
         
@@ -875,7 +1216,7 @@ class BrowserCaptchaService:
         if not self._initialized or not self.browser:
             await self.initialize()
 
-        start_time = time.time()
+        start_time = time.monotonic()
         tab = None
 
         try:
@@ -883,18 +1224,11 @@ class BrowserCaptchaService:
             debug_logger.log_info(f"[BrowserCaptcha] [Legacy] 访问页面: {website_url}")
 
             # 新建标签页并访问页面
-            tab = await self.browser.get(website_url)
+            tab = await self._open_flow_tab(website_url)
 
-            # 等待页面完全加载（增加等待时间）
+            # 等待页面加载完成（上限与原先 3s + 10 次 0.5s 轮询一致，未完成也继续检测 reCAPTCHA）
             debug_logger.log_info("[BrowserCaptcha] [Legacy] 等待页面加载...")
-            await tab.sleep(3)
-            
-            # 等待页面 DOM 完成
-            for _ in range(10):
-                ready_state = await tab.evaluate("document.readyState")
-                if ready_state == "complete":
-                    break
-                await tab.sleep(0.5)
+            await self._wait_page_loaded(tab, 8)
 
             # 等待 reCAPTCHA 加载
             recaptcha_ready = await self._wait_for_recaptcha(tab)
@@ -907,7 +1241,7 @@ class BrowserCaptchaService:
             debug_logger.log_info(f"[BrowserCaptcha] [Legacy] 执行 reCAPTCHA 验证 (action: {action})...")
             token = await self._execute_recaptcha_on_tab(tab, action)
 
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.monotonic() - start_time) * 1000
 
             if token:
                 self._last_fingerprint = await self._extract_tab_fingerprint(tab)
@@ -936,6 +1270,16 @@ class BrowserCaptchaService:
 
     async def close(self):
         """关闭浏览器"""
+        if self._prewarm_task and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+            try:
+                await self._prewarm_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._prewarm_task = None
+        for task in list(self._background_tasks):
+            task.cancel()
+
         # 先停止所有常驻模式（关闭所有常驻标签页）
         await self.stop_resident_mode()
         
@@ -973,36 +1317,66 @@ class BrowserCaptchaService:
 
     # ========== Session Token 刷新 ==========
 
-    async def refresh_session_token(self, project_id: str) -> Optional[str]:
+    async def _get_session_cookie(self, tab):
+        """通过 Network.getCookies 只读取 Flow 站点的 cookies 并查找 session-token，未找到返回 None"""
+        cookies = await tab.send(uc.cdp.network.get_cookies(urls=_SESSION_COOKIE_URLS))
+        return next((c for c in cookies if c.name == _SESSION_COOKIE_NAME), None)
+
+    async def refresh_session_token(
+        self, project_id: str, current_st: Optional[str] = None
+    ) -> Optional[str]:
         """从常驻标签页获取最新的 Session Token
         
         复用 reCAPTCHA 常驻标签页，通过刷新页面并从 cookies 中提取
-        __Secure-next-auth.session-token
+        __Secure-next-auth.session-token。同一 project_id 的并发调用共享同一次刷新。
         
         Args:
             project_id: 项目ID，用于定位常驻标签页
+            current_st: 调用方当前持有的 ST；浏览器中已有不同且未临近过期的 ST 时直接返回，跳过刷新
             
         Returns:
             新的 Session Token，如果获取失败返回 None
         """
+        task = self._session_refresh_tasks.get(project_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh_session_token_once(project_id, current_st))
+            self._session_refresh_tasks[project_id] = task
+
+            def _cleanup(done_task: asyncio.Task, key: str = project_id):
+                if self._session_refresh_tasks.get(key) is done_task:
+                    del self._session_refresh_tasks[key]
+
+            task.add_done_callback(_cleanup)
+        else:
+            debug_logger.log_info(f"[BrowserCaptcha] project_id={project_id} 的 Session Token 正在刷新，等待结果...")
+        # shield：某个等待方被取消时不影响共享的刷新任务
+        return await asyncio.shield(task)
+
+    async def _refresh_session_token_once(
+        self, project_id: str, current_st: Optional[str]
+    ) -> Optional[str]:
         # 确保浏览器已初始化
         await self.initialize()
         
-        start_time = time.time()
+        start_time = time.monotonic()
         debug_logger.log_info(f"[BrowserCaptcha] 开始刷新 Session Token (project: {project_id})...")
         
-        # 尝试获取或创建常驻标签页
-        async with self._resident_lock:
-            resident_info = self._resident_tabs.get(project_id)
-            
-            # 如果该 project_id 没有常驻标签页，则创建
-            if resident_info is None:
-                debug_logger.log_info(f"[BrowserCaptcha] project_id={project_id} 没有常驻标签页，正在创建...")
-                resident_info = await self._create_resident_tab(project_id)
+        # 尝试获取或创建常驻标签页（已存在时直接使用，无需加锁）
+        resident_info = self._resident_tabs.get(project_id)
+        if resident_info is not None:
+            self._touch_resident_tab(project_id, resident_info)
+        else:
+            async with self._resident_lock_for(project_id):
+                resident_info = self._resident_tabs.get(project_id)
+                
+                # 如果该 project_id 没有常驻标签页，则创建
                 if resident_info is None:
-                    debug_logger.log_warning(f"[BrowserCaptcha] 无法为 project_id={project_id} 创建常驻标签页")
-                    return None
-                self._resident_tabs[project_id] = resident_info
+                    debug_logger.log_info(f"[BrowserCaptcha] project_id={project_id} 没有常驻标签页，正在创建...")
+                    resident_info = await self._create_resident_tab(project_id)
+                    if resident_info is None:
+                        debug_logger.log_warning(f"[BrowserCaptcha] 无法为 project_id={project_id} 创建常驻标签页")
+                        return None
+                    await self._store_resident_tab(project_id, resident_info)
         
         if not resident_info or not resident_info.tab:
             debug_logger.log_error(f"[BrowserCaptcha] 无法获取常驻标签页")
@@ -1010,37 +1384,52 @@ class BrowserCaptchaService:
         
         tab = resident_info.tab
         
+        if current_st:
+            try:
+                cookie = await self._get_session_cookie(tab)
+                # expires <= 0 表示会话 cookie，没有固定过期时间
+                if (
+                    cookie is not None
+                    and cookie.value != current_st
+                    and (
+                        cookie.expires is None
+                        or cookie.expires <= 0
+                        or cookie.expires - time.time() > _SESSION_COOKIE_REFRESH_MARGIN_SECONDS
+                    )
+                ):
+                    duration_ms = (time.monotonic() - start_time) * 1000
+                    debug_logger.log_info(
+                        f"[BrowserCaptcha] ✅ 浏览器中已有新的 Session Token，跳过刷新（耗时 {duration_ms:.0f}ms）"
+                    )
+                    return cookie.value
+            except Exception as e:
+                debug_logger.log_warning(f"[BrowserCaptcha] 预读 session cookie 失败: {e}")
+        
         try:
             # 刷新页面以获取最新的 cookies
             debug_logger.log_info(f"[BrowserCaptcha] 刷新常驻标签页以获取最新 cookies...")
+            # 给旧文档打标记，避免刷新尚未生效时把旧页面的 complete 状态当成加载完成
+            await tab.evaluate("window.__flow_stale_document = true")
             await tab.reload()
             
-            # 等待页面加载完成
-            for i in range(30):
-                await asyncio.sleep(1)
-                try:
-                    ready_state = await tab.evaluate("document.readyState")
-                    if ready_state == "complete":
-                        break
-                except Exception:
-                    pass
-            
-            # 额外等待确保 cookies 已设置
-            await asyncio.sleep(2)
+            # 等待页面加载完成（load 事件触发即返回）
+            await self._wait_page_loaded(tab, 30)
             
             # 从 cookies 中提取 __Secure-next-auth.session-token
-            # nodriver 可以通过 browser 获取 cookies
+            # 通过当前标签页的 CDP 会话按 URL 过滤读取 cookies。
+            # 页面加载后 next-auth 可能稍后才轮换 cookie：最多轮询约 2 秒，
+            # 拿到与调用方当前 ST 不同的值即返回，取代固定等待 2 秒
             session_token = None
             
             try:
-                # 使用 nodriver 的 cookies API 获取所有 cookies
-                cookies = await self.browser.cookies.get_all()
-                
-                for cookie in cookies:
-                    if cookie.name == "__Secure-next-auth.session-token":
+                for _ in range(20):
+                    cookie = await self._get_session_cookie(tab)
+                    if cookie is not None:
                         session_token = cookie.value
-                        break
-                        
+                        if not current_st or session_token != current_st:
+                            break
+                    await asyncio.sleep(0.1)
+                    
             except Exception as e:
                 debug_logger.log_warning(f"[BrowserCaptcha] 通过 cookies API 获取失败: {e}，尝试从 document.cookie 获取...")
                 
@@ -1050,13 +1439,13 @@ class BrowserCaptchaService:
                     if all_cookies:
                         for part in all_cookies.split(";"):
                             part = part.strip()
-                            if part.startswith("__Secure-next-auth.session-token="):
+                            if part.startswith(f"{_SESSION_COOKIE_NAME}="):
                                 session_token = part.split("=", 1)[1]
                                 break
                 except Exception as e2:
                     debug_logger.log_error(f"[BrowserCaptcha] document.cookie 获取失败: {e2}")
             
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.monotonic() - start_time) * 1000
             
             if session_token:
                 debug_logger.log_info(f"[BrowserCaptcha] ✅ Session Token 获取成功（耗时 {duration_ms:.0f}ms）")
@@ -1069,18 +1458,17 @@ class BrowserCaptchaService:
             debug_logger.log_error(f"[BrowserCaptcha] 刷新 Session Token 异常: {str(e)}")
             
             # 常驻标签页可能已失效，尝试重建
-            async with self._resident_lock:
-                await self._close_resident_tab(project_id)
+            async with self._resident_lock_for(project_id):
+                self._discard_resident_tab(project_id)
                 resident_info = await self._create_resident_tab(project_id)
                 if resident_info:
-                    self._resident_tabs[project_id] = resident_info
+                    await self._store_resident_tab(project_id, resident_info)
                     # 重建后再次尝试获取
                     try:
-                        cookies = await self.browser.cookies.get_all()
-                        for cookie in cookies:
-                            if cookie.name == "__Secure-next-auth.session-token":
-                                debug_logger.log_info(f"[BrowserCaptcha] ✅ 重建后 Session Token 获取成功")
-                                return cookie.value
+                        cookie = await self._get_session_cookie(resident_info.tab)
+                        if cookie is not None:
+                            debug_logger.log_info(f"[BrowserCaptcha] ✅ 重建后 Session Token 获取成功")
+                            return cookie.value
                     except Exception:
                         pass
             
@@ -1127,11 +1515,13 @@ class BrowserCaptchaService:
         )
         max_retries = 2
 
-        async with self._custom_lock:
+        async with self._custom_lock_for(cache_key):
             for attempt in range(max_retries):
-                start_time = time.time()
+                start_time = time.monotonic()
                 custom_info = self._custom_tabs.get(cache_key)
                 tab = custom_info.get("tab") if isinstance(custom_info, dict) else None
+                if custom_info is not None:
+                    self._custom_tabs.move_to_end(cache_key)
 
                 try:
                     if tab is None:
@@ -1143,16 +1533,9 @@ class BrowserCaptchaService:
                             "warmed_up": False,
                             "created_at": time.time(),
                         }
-                        self._custom_tabs[cache_key] = custom_info
-
-                    page_loaded = False
-                    for _ in range(20):
-                        ready_state = await tab.evaluate("document.readyState")
-                        if ready_state == "complete":
-                            page_loaded = True
-                            break
-                        await tab.sleep(0.5)
+                        self._store_custom_tab(cache_key, custom_info)
 
+                    page_loaded = await self._wait_page_loaded(tab, 10)
                     if not page_loaded:
                         raise RuntimeError("自定义页面加载超时")
 
@@ -1166,57 +1549,20 @@ class BrowserCaptchaService:
                             raise RuntimeError("自定义 reCAPTCHA 无法加载")
                         custom_info["recaptcha_ready"] = True
 
+                    needs_warmup = not custom_info.get("warmed_up") and warmup_seconds > 0
+                    # 首次预热的滚动/事件与常规交互合并为一次 evaluate，减少 CDP 往返
                     try:
-                        await tab.evaluate("""
-                            (() => {
-                                try {
-                                    const body = document.body || document.documentElement;
-                                    const width = window.innerWidth || 1280;
-                                    const height = window.innerHeight || 720;
-                                    const x = Math.max(24, Math.floor(width * 0.38));
-                                    const y = Math.max(24, Math.floor(height * 0.32));
-                                    const moveEvent = new MouseEvent('mousemove', {
-                                        bubbles: true,
-                                        clientX: x,
-                                        clientY: y
-                                    });
-                                    const overEvent = new MouseEvent('mouseover', {
-                                        bubbles: true,
-                                        clientX: x,
-                                        clientY: y
-                                    });
-                                    window.focus();
-                                    window.dispatchEvent(new Event('focus'));
-                                    document.dispatchEvent(moveEvent);
-                                    document.dispatchEvent(overEvent);
-                                    if (body) {
-                                        body.dispatchEvent(moveEvent);
-                                        body.dispatchEvent(overEvent);
-                                    }
-                                    window.scrollTo(0, Math.min(320, document.body?.scrollHeight || 320));
-                                } catch (e) {}
-                            })()
-                        """)
+                        await tab.evaluate(
+                            _CUSTOM_INTERACTION_WITH_WARMUP_JS if needs_warmup else _CUSTOM_INTERACTION_JS
+                        )
                     except Exception:
                         pass
 
                     if not custom_info.get("warmed_up"):
-                        if warmup_seconds > 0:
+                        if needs_warmup:
                             debug_logger.log_info(
                                 f"[BrowserCaptcha] [Custom] 首次预热测试页面 {warmup_seconds:.1f}s 后再执行 token"
                             )
-                            try:
-                                await tab.evaluate("""
-                                    (() => {
-                                        try {
-                                            window.scrollTo(0, Math.min(240, document.body.scrollHeight || 240));
-                                            window.dispatchEvent(new Event('mousemove'));
-                                            window.dispatchEvent(new Event('focus'));
-                                        } catch (e) {}
-                                    })()
-                                """)
-                            except Exception:
-                                pass
                             await tab.sleep(warmup_seconds)
                         custom_info["warmed_up"] = True
                     elif per_request_settle_seconds > 0:
@@ -1233,16 +1579,21 @@ class BrowserCaptchaService:
                         enterprise=enterprise,
                     )
 
-                    duration_ms = (time.time() - start_time) * 1000
+                    duration_ms = (time.monotonic() - start_time) * 1000
                     if token:
                         extracted_fingerprint = await self._extract_tab_fingerprint(tab)
                         if not extracted_fingerprint:
                             try:
-                                fallback_ua = await tab.evaluate("navigator.userAgent || ''")
-                                fallback_lang = await tab.evaluate("navigator.language || ''")
+                                # 一次 CDP 往返同时取 UA 与语言
+                                fallback = await tab.evaluate(
+                                    "({ua: navigator.userAgent || '', lang: navigator.language || ''})",
+                                    return_by_value=True,
+                                )
+                                if not isinstance(fallback, dict):
+                                    fallback = {}
                                 extracted_fingerprint = {
-                                    "user_agent": fallback_ua or "",
-                                    "accept_language": fallback_lang or "",
+                                    "user_agent": fallback.get("ua") or "",
+                                    "accept_language": fallback.get("lang") or "",
                                     "proxy_url": None,
                                 }
                             except Exception:
@@ -1280,14 +1631,14 @@ class BrowserCaptchaService:
         enterprise: bool = False,
     ) -> Dict[str, Any]:
         """在同一个常驻标签页里获取 token 并直接校验页面分数。"""
-        token_started_at = time.time()
+        token_started_at = time.monotonic()
         token = await self.get_custom_token(
             website_url=website_url,
             website_key=website_key,
             action=action,
             enterprise=enterprise,
         )
-        token_elapsed_ms = int((time.time() - token_started_at) * 1000)
+        token_elapsed_ms = int((time.monotonic() - token_started_at) * 1000)
 
         if not token:
             return {
@@ -1300,7 +1651,7 @@ class BrowserCaptchaService:
             }
 
         cache_key = f"{website_url}|{website_key}|{1 if enterprise else 0}"
-        async with self._custom_lock:
+        async with self._custom_lock_for(cache_key):
             custom_info = self._custom_tabs.get(cache_key)
             tab = custom_info.get("tab") if isinstance(custom_info, dict) else None
             if tab is None:
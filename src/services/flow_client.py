@@ -213,19 +213,18 @@ class FlowClient:
             headers.setdefault(key, value)
 
         # Log request
-        if config.debug_enabled:
-            if isinstance(fingerprint, dict):
-                proxy_for_log = proxy_url if proxy_url else "direct"
-                debug_logger.log_info(
-                    f"[FINGERPRINT] 使用打码浏览器指纹提交请求: UA={headers.get('User-Agent', '')[:120]}, proxy={proxy_for_log}"
-                )
-            debug_logger.log_request(
-                method=method,
-                url=url,
-                headers=headers,
-                body=json_data,
-                proxy=proxy_url
+        if config.debug_enabled and isinstance(fingerprint, dict):
+            proxy_for_log = proxy_url if proxy_url else "direct"
+            debug_logger.log_info(
+                f"[FINGERPRINT] 使用打码浏览器指纹提交请求: UA={headers.get('User-Agent', '')[:120]}, proxy={proxy_for_log}"
             )
+        debug_logger.log_request(
+            method=method,
+            url=url,
+            headers=headers,
+            body=json_data,
+            proxy=proxy_url
+        )
 
         start_time = time.time()
 
@@ -251,14 +250,13 @@ class FlowClient:
 
                 duration_ms = (time.time() - start_time) * 1000
 
-                # Log response
-                if config.debug_enabled:
-                    debug_logger.log_response(
-                        status_code=response.status_code,
-                        headers=dict(response.headers),
-                        body=response.text,
-                        duration_ms=duration_ms
-                    )
+                # Log response（传原始字节，关闭日志时不做解码）
+                debug_logger.log_response(
+                    status_code=response.status_code,
+                    headers=response.headers,
+                    body=response.content,
+                    duration_ms=duration_ms
+                )
 
                 # 检查HTTP错误
                 if response.status_code >= 400:
@@ -1,14 +1,48 @@
 """Proxy management module"""
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 import re
+import time
 from ..core.database import Database
 from ..core.models import ProxyConfig
 
+_ST5_RE = re.compile(r"^st5\s+(.+)$", re.IGNORECASE)
+_PROXY_SCHEMES = ("http://", "https://", "socks5://", "socks5h://")
+# 代理配置很少变动，短 TTL 缓存即可避免每个出站请求都查一次数据库
+_PROXY_CONFIG_TTL = 5.0
+
 class ProxyManager:
     """Proxy configuration manager"""
 
     def __init__(self, db: Database):
         self.db = db
+        # (获取时间, 配置)；update_proxy_config 时立即失效
+        self._config_cache: Optional[Tuple[float, Optional[ProxyConfig]]] = None
+        self._config_lock = asyncio.Lock()
+        self._config_version = 0
+
+    def invalidate(self):
+        """清空代理配置缓存，下次读取时重新查询数据库"""
+        self._config_cache = None
+        self._config_version += 1
+
+    async def _get_config_cached(self) -> Optional[ProxyConfig]:
+        cached = self._config_cache
+        if cached and time.monotonic() - cached[0] < _PROXY_CONFIG_TTL:
+            return cached[1]
+
+        async with self._config_lock:
+            # 等锁期间可能已有其他协程完成查询
+            cached = self._config_cache
+            if cached and time.monotonic() - cached[0] < _PROXY_CONFIG_TTL:
+                return cached[1]
+
+            version = self._config_version
+            config = await self.db.get_proxy_config()
+            # 查询期间发生了更新，则不写入可能过期的结果
+            if version == self._config_version:
+                self._config_cache = (time.monotonic(), config)
+            return config
 
     def _parse_proxy_line(self, line: str) -> Optional[str]:
         """将用户输入代理转换为标准 URL 格式。
@@ -30,23 +64,8 @@ class ProxyManager:
         if not line:
             return None
 
-        # st5 host:port:user:pass
-        st5_match = re.match(r"^st5\s+(.+)$", line, re.IGNORECASE)
-        if st5_match:
-            rest = st5_match.group(1).strip()
-            if "@" in rest:
-                return f"socks5://{rest}"
-            parts = rest.split(":")
-            if len(parts) >= 4 and parts[1].isdigit():
-                host = parts[0]
-                port = parts[1]
-                username = parts[2]
-                password = ":".join(parts[3:])
-                return f"socks5://{username}:{password}@{host}:{port}"
-            return None
-
-        # 协议前缀格式
-        if line.startswith(("http://", "https://", "socks5://", "socks5h://")):
+        # 协议前缀格式（含已标准化的地址，最常见，放在 st5 正则之前判断）
+        if line.startswith(_PROXY_SCHEMES):
             # socks5h 统一转 socks5，便于后续处理
             if line.startswith("socks5h://"):
                 line = "socks5://" + line[len("socks5h://"):]
@@ -73,6 +92,21 @@ class ProxyManager:
                 return None
             return None
 
+        # st5 host:port:user:pass
+        st5_match = _ST5_RE.match(line)
+        if st5_match:
+            rest = st5_match.group(1).strip()
+            if "@" in rest:
+                return f"socks5://{rest}"
+            parts = rest.split(":")
+            if len(parts) >= 4 and parts[1].isdigit():
+                host = parts[0]
+                port = parts[1]
+                username = parts[2]
+                password = ":".join(parts[3:])
+                return f"socks5://{username}:{password}@{host}:{port}"
+            return None
+
         # 无协议，带 @：默认按 http 处理
         if "@" in line:
             return f"http://{line}"
@@ -118,14 +152,14 @@ class ProxyManager:
 
     async def get_request_proxy_url(self) -> Optional[str]:
         """Get request proxy URL if enabled, otherwise return None"""
-        config = await self.db.get_proxy_config()
+        config = await self._get_config_cached()
         if config and config.enabled and config.proxy_url:
             return config.proxy_url
         return None
 
     async def get_media_proxy_url(self) -> Optional[str]:
         """Get media upload/download proxy URL, fallback to request proxy"""
-        config = await self.db.get_proxy_config()
+        config = await self._get_config_cached()
         if config and config.media_proxy_enabled and config.media_proxy_url:
             return config.media_proxy_url
         return await self.get_request_proxy_url()
@@ -147,7 +181,8 @@ class ProxyManager:
             media_proxy_enabled=media_proxy_enabled,
             media_proxy_url=normalized_media_proxy_url
         )
+        self.invalidate()
 
     async def get_proxy_config(self) -> ProxyConfig:
         """Get proxy configuration"""
-        return await self.db.get_proxy_config()
+        return await self._get_config_cached()
@@ -1,13 +1,18 @@
 """Token manager for Flow2API with AT auto-refresh"""
 import asyncio
+import heapq
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from ..core.database import Database
 from ..core.models import Token, Project
 from ..core.logger import debug_logger
 from .flow_client import FlowClient
 from .proxy_manager import ProxyManager
 
+# 429 禁用后自动解禁的等待时间（秒）
+UNBAN_429_SECONDS = 12 * 3600
+
 
 class TokenManager:
     """Token lifecycle manager with AT auto-refresh"""
@@ -16,6 +21,9 @@ class TokenManager:
         self.db = db
         self.flow_client = flow_client
         self._lock = asyncio.Lock()
+        # 429 解禁调度：(解禁时间戳, token_id) 小顶堆 + 新禁用时唤醒调度循环的事件
+        self._unban_heap: List[Tuple[float, int]] = []
+        self._unban_event = asyncio.Event()
 
     # ========== Token CRUD ==========
 
@@ -393,7 +401,7 @@ class TokenManager:
             from .browser_captcha_personal import BrowserCaptchaService
             service = await BrowserCaptchaService.get_instance(self.db)
 
-            new_st = await service.refresh_session_token(token.current_project_id)
+            new_st = await service.refresh_session_token(token.current_project_id, current_st=token.st)
             if new_st and new_st != token.st:
                 # 更新数据库中的 ST
                 await self.db.update_token(token_id, st=new_st)
@@ -493,12 +501,34 @@ class TokenManager:
             token_id: Token ID
         """
         debug_logger.log_warning(f"[429_BAN] 禁用Token {token_id} (原因: 429 Rate Limit)")
+        banned_at = datetime.now(timezone.utc)
         await self.db.update_token(
             token_id,
             is_active=False,
             ban_reason="429_rate_limit",
-            banned_at=datetime.now(timezone.utc)
+            banned_at=banned_at
         )
+        heapq.heappush(self._unban_heap, (banned_at.timestamp() + UNBAN_429_SECONDS, token_id))
+        self._unban_event.set()
+
+    async def wait_for_next_unban(self, max_wait: float = 3600):
+        """等待到最早的429解禁时间点
+
+        有新的429禁用时会被唤醒并重新计算等待时间；没有待解禁token时最多等待 max_wait 秒（兜底全量检查）
+        """
+        wake_at = time.time() + max_wait
+        while True:
+            self._unban_event.clear()
+            now = time.time()
+            delay = wake_at - now
+            if self._unban_heap:
+                delay = min(delay, self._unban_heap[0][0] - now)
+            if delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._unban_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                return
 
     async def auto_unban_429_tokens(self):
         """自动解禁因429被禁用的token
@@ -508,8 +538,11 @@ class TokenManager:
         - 仅解禁未过期的token
         - 仅解禁因429被禁用的token
         """
-        all_tokens = await self.db.get_all_tokens()
         now = datetime.now(timezone.utc)
+        # 全量检查会重新登记所有未到期的禁用，先清空调度堆
+        self._unban_heap = []
+
+        all_tokens = await self.db.get_all_tokens()
 
         for token in all_tokens:
             # 跳过非429禁用的token
@@ -545,19 +578,22 @@ class TokenManager:
 
             # 检查是否已过12小时
             time_since_ban = now - banned_at_aware
-            if time_since_ban.total_seconds() >= 12 * 3600:  # 12小时
-                debug_logger.log_info(
-                    f"[AUTO_UNBAN] 解禁Token {token.id} (禁用时间: {banned_at_aware}, "
-                    f"已过 {time_since_ban.total_seconds() / 3600:.1f} 小时)"
-                )
-                await self.db.update_token(
-                    token.id,
-                    is_active=True,
-                    ban_reason=None,
-                    banned_at=None
-                )
-                # 重置错误计数
-                await self.db.reset_error_count(token.id)
+            if time_since_ban.total_seconds() < UNBAN_429_SECONDS:
+                # 未到期：登记解禁时间，到点由调度循环唤醒
+                heapq.heappush(self._unban_heap, (banned_at_aware.timestamp() + UNBAN_429_SECONDS, token.id))
+                continue
+            debug_logger.log_info(
+                f"[AUTO_UNBAN] 解禁Token {token.id} (禁用时间: {banned_at_aware}, "
+                f"已过 {time_since_ban.total_seconds() / 3600:.1f} 小时)"
+            )
+            await self.db.update_token(
+                token.id,
+                is_active=True,
+                ban_reason=None,
+                banned_at=None
+            )
+            # 重置错误计数
+            await self.db.reset_error_count(token.id)
 
     # ========== 余额刷新 ==========
 